@@ -1,4 +1,4 @@
 # COMP30024 Artificial Intelligence, Semester 1 2023
 # Project Part B: Game Playing Agent
 
-from .program import Agent
\ No newline at end of file
+from .program import Agent, buildEngine
\ No newline at end of file
@@ -0,0 +1,119 @@
+from .constants import *
+from .state import (SPREAD_CELLS, SPREAD_MASKS, COLOUR_SHIFT, POWER_MASK, NUM_CELLS,
+                    maskCells, spreadMove)
+
+# Attack maps: for each colour and cell, how many of that colour's spreads
+# reach the cell. They are kept up to date from the (cell, old, new) changes
+# returned by State.apply, so a move only touches the lines through the cells
+# it changed.
+
+
+class AttackMaps:
+    def __init__(self, state):
+        self.counts = [[0] * NUM_CELLS, [0] * NUM_CELLS]
+        # Cells reached by at least one spread of each colour
+        self.reach = [0, 0]
+        for cell, value in enumerate(state.cells):
+            if value:
+                self._add(cell, value)
+
+    def _add(self, cell, value):
+        colour = value >> COLOUR_SHIFT
+        power = value & POWER_MASK
+        counts = self.counts[colour]
+        reach = self.reach[colour]
+        for targets in SPREAD_CELLS[cell]:
+            for target in targets[power]:
+                counts[target] += 1
+                reach |= 1 << target
+        self.reach[colour] = reach
+
+    def _remove(self, cell, value):
+        colour = value >> COLOUR_SHIFT
+        power = value & POWER_MASK
+        counts = self.counts[colour]
+        reach = self.reach[colour]
+        for targets in SPREAD_CELLS[cell]:
+            for target in targets[power]:
+                counts[target] -= 1
+                if not counts[target]:
+                    reach &= ~(1 << target)
+        self.reach[colour] = reach
+
+    def update(self, changes):
+        """
+        Apply the changes returned by State.apply
+        """
+        for cell, old, new in changes:
+            if old:
+                self._remove(cell, old)
+            if new:
+                self._add(cell, new)
+
+    def revert(self, changes):
+        """
+        Take back changes passed to update, after State.undo
+        """
+        for cell, old, new in reversed(changes):
+            if new:
+                self._remove(cell, new)
+            if old:
+                self._add(cell, old)
+
+    def captureCount(self, state, colour):
+        """
+        Spreads of colour landing on enemy cells, as counted by the greedy evaluator
+        """
+        counts = self.counts[colour]
+        return sum(counts[cell] for cell in maskCells(state.masks[1 - colour]))
+
+    def allySpreadCount(self, state, colour):
+        """
+        Spreads of colour landing on its own cells
+        """
+        counts = self.counts[colour]
+        return sum(counts[cell] for cell in maskCells(state.masks[colour]))
+
+
+def captureMoves(state, maps):
+    """
+    Spreads of the side to move that capture, most captures first
+    """
+    turn = state.turn
+    enemy = state.masks[1 - turn]
+    if not maps.reach[turn] & enemy:
+        return []
+    scored = []
+    for cell in maskCells(state.masks[turn]):
+        power = state.cells[cell] & POWER_MASK
+        for direction in range(len(DIRECTIONS)):
+            captured = (SPREAD_MASKS[cell][direction][power] & enemy).bit_count()
+            if captured:
+                scored.append((captured, spreadMove(cell, direction)))
+    scored.sort(reverse=True)
+    return [move for _, move in scored]
+
+
+def orderMoves(state, maps, moves):
+    """
+    Order moves for search: captures (most first), then other spreads, then
+    spawns on cells the opponent cannot reach, then the rest. Returns the
+    ordered moves and the number of captures at their front.
+    """
+    captures = captureMoves(state, maps)
+    first = set(captures)
+    enemy_reach = maps.reach[1 - state.turn]
+    spreads = []
+    safe_spawns = []
+    spawns = []
+    for move in moves:
+        if move in first:
+            continue
+        if move >= NUM_CELLS:
+            spreads.append(move)
+        elif enemy_reach >> move & 1:
+            spawns.append(move)
+        else:
+            safe_spawns.append(move)
+    return captures + spreads + safe_spawns + spawns, len(captures)
+
@@ -0,0 +1,289 @@
+# Benchmarks for the search and its supporting tables.
+# Run with: python -m agent.benchmark [--positions N] [--depth D]
+
+import argparse
+import contextlib
+import copy
+import pickle
+import random
+import time
+
+from referee.game import Board, SpreadAction
+from . import engine as engine_core
+from .engine import Engine, SEARCHES, EVALUATORS
+from .symmetry import boardHash, updateHash, canonicalKey, rawKey
+from .records import encodeAction
+from .state import State, moveCell, moveDirection
+from .attacks import AttackMaps
+from .position import fromBoard, encodeState, decodeState, legalActions
+
+
+@contextlib.contextmanager
+def overrides(module, **values):
+    """
+    Temporarily set module constants
+    """
+    saved = {name: getattr(module, name) for name in values}
+    for name, value in values.items():
+        setattr(module, name, value)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(module, name, value)
+
+
+def randomPositions(count, turns, seed=0):
+    """
+    Positions reached by random playouts of the given length
+    """
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        board = Board()
+        for _ in range(turns):
+            if board.game_over:
+                break
+            board.apply_action(rng.choice(legalActions(board)))
+        if not board.game_over:
+            positions.append(board)
+    return positions
+
+
+def timeit(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def benchmarkSpreads(positions, repeat=1000):
+    """
+    Cost of one spread and its capture count with the referee Board and
+    with the compact State tables
+    """
+    board = positions[0]
+    state = fromBoard(board)
+    action = next(action for action in legalActions(board) if isinstance(action, SpreadAction))
+    move = encodeAction(action)
+    cell, direction = moveCell(move), moveDirection(move)
+
+    def boardSpread():
+        board.apply_action(action)
+        board.undo_action()
+
+    def stateSpread():
+        state.copy().apply(move)
+
+    def walkCaptures():
+        count = 0
+        pos = action.cell
+        for _ in range(board._state[action.cell].power):
+            pos = pos + action.direction
+            if board._state[pos].player not in (None, board.turn_color):
+                count += 1
+        return count
+
+    print("Spreads")
+    print(f"  Board apply + undo   {timeit(boardSpread, repeat) * 1e6:8.2f} us")
+    print(f"  State copy + apply   {timeit(stateSpread, repeat) * 1e6:8.2f} us")
+    print(f"  walk capture count   {timeit(walkCaptures, repeat) * 1e6:8.2f} us")
+    print(f"  mask capture count   {timeit(lambda: state.captureCount(cell, direction), repeat) * 1e6:8.2f} us")
+
+
+def benchmarkAttackMaps(games, seed=0):
+    """
+    Cost of updating attack maps after a move against rebuilding them, over
+    random games
+    """
+    rng = random.Random(seed)
+    update_time = rebuild_time = 0.0
+    moves = 0
+    for _ in range(games):
+        state = State()
+        maps = AttackMaps(state)
+        while not state.game_over:
+            move = rng.choice(state.legalMoves())
+            start = time.perf_counter()
+            changes = state.apply(move)
+            maps.update(changes)
+            update_time += time.perf_counter() - start
+            start = time.perf_counter()
+            AttackMaps(state)
+            rebuild_time += time.perf_counter() - start
+            moves += 1
+    print("Attack maps")
+    print(f"  apply + update       {update_time / moves * 1e6:8.2f} us")
+    print(f"  rebuild              {rebuild_time / moves * 1e6:8.2f} us")
+
+
+def benchmarkPositions(positions, repeat=1000):
+    """
+    Cost of copying and serialising a position as a referee Board and as a
+    compact record
+    """
+    board = positions[0]
+    state = fromBoard(board)
+    data = encodeState(state)
+    print("Positions")
+    print(f"  Board deepcopy       {timeit(lambda: copy.deepcopy(board), repeat) * 1e6:8.2f} us")
+    print(f"  Board pickle         {timeit(lambda: pickle.loads(pickle.dumps(board)), repeat) * 1e6:8.2f} us "
+          f"({len(pickle.dumps(board))} bytes)")
+    print(f"  State encode/decode  {timeit(lambda: decodeState(encodeState(state)), repeat) * 1e6:8.2f} us "
+          f"({len(data)} bytes)")
+
+
+def benchmarkCanonical(positions, repeat=1000):
+    """
+    Cost of hashing and canonicalising a position
+    """
+    board = positions[0]
+    zhash = boardHash(board)
+    mutation = board.apply_action(legalActions(board)[0])
+    board.undo_action()
+
+    print("Canonicalisation")
+    print(f"  full hash        {timeit(lambda: boardHash(board), repeat) * 1e6:8.2f} us")
+    print(f"  incremental hash {timeit(lambda: updateHash(zhash, mutation), repeat) * 1e6:8.2f} us")
+    print(f"  raw key          {timeit(lambda: rawKey(zhash), repeat) * 1e6:8.2f} us")
+    print(f"  canonical key    {timeit(lambda: canonicalKey(zhash), repeat) * 1e6:8.2f} us")
+
+
+def benchmarkTable(positions, depth):
+    """
+    Transposition table hit rate with raw and canonical keys
+    """
+    print(f"Transposition table, depth {depth}")
+    states = [fromBoard(board) for board in positions]
+    for canonical in (False, True):
+        engine = Engine(depth=depth, canonical_keys=canonical)
+        start = time.perf_counter()
+        for state in states:
+            engine.chooseMove(state)
+        elapsed = time.perf_counter() - start
+        table = engine.table
+        label = "canonical" if canonical else "raw"
+        print(f"  {label:9} hit rate {table.hitRate():6.1%}  probes {table.probes:7}  "
+              f"entries {len(table.entries):7}  time {elapsed:7.2f} s")
+
+
+def benchmarkEvalCache(positions, depth):
+    """
+    Evaluation cache hit rate and search time with and without the cache
+    """
+    states = [fromBoard(board) for board in positions]
+    engine = Engine(depth=depth)
+    print(f"Evaluation cache, depth {depth}, {engine.eval_cache.nbytes // 1024} KiB")
+    for enabled in (False, True):
+        engine.table.clear()
+        engine.eval_cache.clear()
+        with overrides(engine_core, USE_EVAL_CACHE=enabled):
+            start = time.perf_counter()
+            for state in states:
+                engine.chooseMove(state)
+            elapsed = time.perf_counter() - start
+        cache = engine.eval_cache
+        label = "cached" if enabled else "uncached"
+        print(f"  {label:9} hit rate {cache.hitRate():6.1%}  evictions {cache.evictions:7}  "
+              f"time {elapsed:7.2f} s")
+
+
+# Selective search switches compared by benchmarkSelective
+SELECTIVE_OPTIONS = ["null_move", "late_move_reductions", "futility"]
+
+
+def benchmarkSelective(positions, time_budget, search="alphabeta"):
+    """
+    Depth reached by iterative deepening within a time budget per position,
+    with each selective search option alone and all together
+    """
+    print(f"Selective search ({search}), {time_budget} s per position")
+    states = [fromBoard(board) for board in positions]
+    configs = [[]] + [[option] for option in SELECTIVE_OPTIONS] + [SELECTIVE_OPTIONS]
+    for enabled in configs:
+        depths = []
+        nodes = 0
+        elapsed = 0.0
+        for state in states:
+            engine = Engine(search, **{option: option in enabled for option in SELECTIVE_OPTIONS})
+            start = time.perf_counter()
+            depth = 0
+            while time.perf_counter() - start < time_budget:
+                engine.chooseMove(state, depth + 1)
+                depth += 1
+            elapsed += time.perf_counter() - start
+            nodes += engine.nodes
+            depths.append(depth)
+        label = " + ".join(enabled) or "full width"
+        print(f"  {label:45} mean depth {sum(depths) / len(depths):5.2f}  "
+              f"depth/s {sum(depths) / elapsed:6.3f}  nodes/s {nodes / elapsed:8.0f}")
+
+
+def benchmarkEngines(positions, depth, searches=None, evaluators=None):
+    """
+    Move time and nodes per second of every search and evaluator pair
+    """
+    print(f"Engines, depth {depth}")
+    for search in searches or SEARCHES:
+        for evaluator in evaluators or EVALUATORS:
+            try:
+                engine = Engine(search, evaluator, depth)
+            except FileNotFoundError as error:
+                print(f"  {search}/{evaluator}: skipped, {error}")
+                continue
+            states = [fromBoard(board) for board in positions]
+            start = time.perf_counter()
+            for state in states:
+                engine.chooseMove(state)
+            elapsed = time.perf_counter() - start
+            print(f"  {engine.name:20} {elapsed / len(states) * 1e3:9.2f} ms/move  "
+                  f"nodes/s {engine.nodes / elapsed:8.0f}")
+
+
+def benchmarkQuiescence(positions, depth, quiescence_depths=(1, 2, 4)):
+    """
+    Move time and nodes of alpha-beta with quiescence at its leaves, and how
+    many of its moves differ from plain leaf evaluation
+    """
+    print(f"Quiescence, depth {depth}")
+    states = [fromBoard(board) for board in positions]
+    baseline = None
+    for quiescence_depth in (0,) + tuple(quiescence_depths):
+        with overrides(engine_core, QUIESCENCE_DEPTH=quiescence_depth):
+            engine = Engine("alphabeta", depth=depth, quiescence=quiescence_depth > 0)
+            start = time.perf_counter()
+            moves = [engine.chooseMove(state) for state in states]
+            elapsed = time.perf_counter() - start
+        if baseline is None:
+            baseline = moves
+        changed = sum(move != base for move, base in zip(moves, baseline))
+        label = f"depth {quiescence_depth}" if quiescence_depth else "off"
+        print(f"  {label:10} {elapsed / len(states) * 1e3:9.2f} ms/move  nodes {engine.nodes / len(states):9.0f}"
+              f"  moves changed {changed}/{len(states)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Agent benchmarks")
+    parser.add_argument("--positions", type=int, default=5)
+    parser.add_argument("--turns", type=int, default=6)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--time-budget", type=float, default=5.0)
+    parser.add_argument("--games", type=int, default=20, help="random games for the attack maps")
+    parser.add_argument("--search", action="append", help="engine searches to compare (default all)")
+    parser.add_argument("--evaluator", action="append", help="engine evaluators to compare (default all)")
+    args = parser.parse_args()
+
+    positions = randomPositions(args.positions, args.turns)
+    benchmarkSpreads(positions)
+    benchmarkAttackMaps(args.games)
+    benchmarkPositions(positions)
+    benchmarkCanonical(positions)
+    benchmarkTable(positions, args.depth)
+    benchmarkEvalCache(positions, args.depth)
+    benchmarkSelective(positions, args.time_budget)
+    benchmarkEngines(positions, args.depth, args.search, args.evaluator)
+    benchmarkQuiescence(positions, args.depth)
+
+
+if __name__ == "__main__":
+    main()
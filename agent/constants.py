@@ -2,8 +2,107 @@ from referee.game import HexDir
 
 BOARD_SIZE = 7
 DIRECTIONS = [HexDir.Up, HexDir.UpRight, HexDir.UpLeft, HexDir.Down, HexDir.DownLeft, HexDir.DownRight]
+DIRECTION_INDEX = {direction: i for i, direction in enumerate(DIRECTIONS)}
 EAT_WEIGHT = 10
 POWER_WEIGHT = 8
 TOKEN_WEIGHT = 5
 DISTANCE_WEIGHT = 1
-ALPHA = 0.1
\ No newline at end of file
+ALPHA = 0.1
+
+# Board cells and stack powers
+NUM_CELLS = BOARD_SIZE * BOARD_SIZE
+MAX_POWER = 6
+
+# Zobrist hashing and transposition table
+HASH_SEED = 30024
+TT_SIZE = 200000
+# Canonical keys cost far more than raw ones (see benchmark.py) and have not
+# raised the table's hit rate enough at the agent's depth to pay for it
+USE_CANONICAL_KEYS = False
+
+# Game rules mirrored from the referee
+MAX_TOTAL_POWER = 49
+MAX_TURNS = 343
+WIN_POWER_DIFF = 2
+
+# Selective search
+USE_NULL_MOVE = False
+NULL_MOVE_REDUCTION = 1
+NULL_MOVE_MIN_DEPTH = 3
+NULL_MOVE_MIN_TOKENS = 3
+USE_LATE_MOVE_REDUCTIONS = False
+LMR_MIN_DEPTH = 2
+LMR_FULL_MOVES = 4
+LMR_REDUCTION = 1
+USE_FUTILITY_PRUNING = False
+# A quiet move raises the mover's power by at most one (a spawn), so the
+# utility evaluator's futility margin is a little over one power. Evaluators
+# registered without a quiet move bound are never futility pruned.
+FUTILITY_MARGIN = 1.1
+
+# Quiescence search: leaves play out captures for up to QUIESCENCE_DEPTH
+# plies before they are evaluated
+USE_QUIESCENCE = False
+QUIESCENCE_DEPTH = 2
+
+# Evaluation cache
+USE_EVAL_CACHE = True
+EVAL_CACHE_BYTES = 16 * 1024 * 1024
+# Canonicalising costs more than evaluating a leaf, so leaves use raw keys
+# unless an engine sets canonical_eval_keys
+CANONICAL_EVAL_KEYS = False
+
+# Profiling
+PROFILE_INTERVAL = 0.001
+OPENING_TOKENS = 8
+OPENING_TURNS = 16
+ENDGAME_TOKENS = 3
+
+# Engine: search backend and evaluator, by name (see engine.py)
+# Score of a won game, above any evaluation
+WIN_SCORE = 1000
+ENGINE_SEARCH = "alphabeta"
+ENGINE_EVALUATOR = "utility"
+LEARNED_WEIGHTS_PATH = "weights.npy"
+# Width of the null windows searched by PVS; scores are not integers
+PVS_WINDOW = 1e-6
+MCTS_ITERATIONS = 2000
+MCTS_EXPLORATION = 1.4
+# Evaluation lead, in units of one power, that MCTS treats as a 73% win
+MCTS_TEMPERATURE = 4
+
+# Batched self-play (see selfplay.py)
+SELFPLAY_CONCURRENT_GAMES = 16
+SELFPLAY_DEPTH = 2
+SELFPLAY_RANDOM_PLIES = 4
+# Positions featurised per NumPy batch
+SELFPLAY_BATCH = 4096
+
+# Memory budget (see memory.py)
+# Fraction of the referee's space limit the caches and baseline may use
+MEMORY_CACHE_FRACTION = 0.6
+# Usage, as a fraction of the limit, at which caches are shrunk
+MEMORY_HIGH_WATER = 0.85
+MEMORY_MIN_CACHE_BYTES = 64 * 1024
+MEMORY_MAX_SHRINK_STEPS = 16
+# Priorities (shrunk lowest first) and budget shares of the managed caches
+MEMORY_PRIORITIES = {"eval_cache": 0, "transposition_table": 1}
+MEMORY_SHARES = {"eval_cache": 1, "transposition_table": 2}
+
+# Move latency and time budget
+SEARCH_DEPTH = 3
+LATENCY_WINDOW = 50
+# Moves the remaining time is shared over
+LATENCY_HORIZON_MOVES = 40
+# Fraction of the per move budget a search may be expected to use
+LATENCY_SAFETY = 0.8
+# Below this many seconds only the one-ply greedy move is played
+LATENCY_PANIC_SECONDS = 2.0
+# Assumed p95 move time (seconds) of a level before it or a cheaper level
+# has been timed
+LATENCY_PRIORS = {"full": 2.0, "reduced": 0.5, "greedy": 0.01}
+# Time of a search over that of one a ply shallower, at the agent's depths
+LATENCY_BRANCHING = 20
+# Engine options of the "reduced" level, which also searches one ply less
+LATENCY_REDUCED_OPTIONS = {"canonical_keys": False, "canonical_eval_keys": False, "quiescence": False,
+                           "null_move": False, "late_move_reductions": False, "futility": False}
@@ -0,0 +1,139 @@
+# Build training data from game records: every position of every game is
+# turned into a feature row (see features.py) and labelled with the final
+# result from the side to move's point of view. Shards are written as .npy
+# files that can be loaded with mmap_mode="r".
+# Run with: python -m agent.dataset <games.ifx> <out_dir> [--workers N] [--fit]
+
+import argparse
+import glob
+import multiprocessing
+import os
+import time
+
+import numpy as np
+
+from .constants import *
+from .features import batchFeatures, FEATURES, NUM_FEATURES, FEATURE_DTYPE
+from .records import GameIndex, replay
+
+LABEL_DTYPE = np.int8
+BATCH_SIZE = 2048
+GAMES_PER_SHARD = 1000
+
+
+def shardPaths(out_dir, shard):
+    base = os.path.join(out_dir, f"shard-{shard:05d}")
+    return base + ".features.npy", base + ".labels.npy"
+
+
+def buildShard(task):
+    """
+    Worker: featurise games [start, stop) of a record file into one shard.
+    Only one batch of raw positions is held in memory at a time.
+    """
+    record_path, out_dir, shard, start, stop, stride = task
+    cells = np.empty((BATCH_SIZE, NUM_CELLS), dtype=np.uint8)
+    turns = np.empty(BATCH_SIZE, dtype=np.uint8)
+    labels = np.empty(BATCH_SIZE, dtype=LABEL_DTYPE)
+    feature_parts, label_parts = [], []
+    filled = 0
+
+    def flush():
+        feature_parts.append(batchFeatures(cells[:filled], turns[:filled]))
+        label_parts.append(labels[:filled].copy())
+
+    with GameIndex(record_path) as index:
+        for game_id in range(start, stop):
+            result, moves = index.read(game_id)
+            for ply, state in enumerate(replay(moves)):
+                if ply % stride:
+                    continue
+                cells[filled] = np.frombuffer(state.cells, dtype=np.uint8)
+                turns[filled] = state.turn
+                labels[filled] = result if state.turn == 0 else -result
+                filled += 1
+                if filled == BATCH_SIZE:
+                    flush()
+                    filled = 0
+    if filled:
+        flush()
+
+    features = np.concatenate(feature_parts) if feature_parts else np.empty((0, NUM_FEATURES), FEATURE_DTYPE)
+    shard_labels = np.concatenate(label_parts) if label_parts else np.empty(0, LABEL_DTYPE)
+    features_path, labels_path = shardPaths(out_dir, shard)
+    np.save(features_path, features)
+    np.save(labels_path, shard_labels)
+    return shard, len(shard_labels)
+
+
+def buildDataset(record_path, out_dir, workers=None, games_per_shard=GAMES_PER_SHARD, stride=1):
+    """
+    Featurise every game of a record file on a process pool. Returns the
+    number of positions written.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    with GameIndex(record_path) as index:
+        num_games = len(index)
+    tasks = [(record_path, out_dir, shard, start, min(start + games_per_shard, num_games), stride)
+             for shard, start in enumerate(range(0, num_games, games_per_shard))]
+
+    total = 0
+    with multiprocessing.Pool(workers, maxtasksperchild=16) as pool:
+        for shard, count in pool.imap_unordered(buildShard, tasks):
+            total += count
+    return total
+
+
+def loadShards(out_dir):
+    """
+    Memory-map every shard in a dataset directory as (features, labels) pairs
+    """
+    shards = []
+    for features_path in sorted(glob.glob(os.path.join(out_dir, "shard-*.features.npy"))):
+        labels_path = features_path.replace(".features.npy", ".labels.npy")
+        shards.append((np.load(features_path, mmap_mode="r"), np.load(labels_path, mmap_mode="r")))
+    return shards
+
+
+def fitWeights(out_dir, path):
+    """
+    Least squares fit of the results to the features over every shard, saved
+    for the engine's "learned" evaluator. Shards are accumulated one at a
+    time into the normal equations.
+    """
+    gram = np.zeros((NUM_FEATURES, NUM_FEATURES))
+    moments = np.zeros(NUM_FEATURES)
+    for features, labels in loadShards(out_dir):
+        features = np.asarray(features, dtype=np.float64)
+        gram += features.T @ features
+        moments += features.T @ labels
+    weights = np.linalg.lstsq(gram, moments, rcond=None)[0]
+    np.save(path, weights)
+    return weights
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build feature shards from game records")
+    parser.add_argument("records")
+    parser.add_argument("out_dir")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--games-per-shard", type=int, default=GAMES_PER_SHARD)
+    parser.add_argument("--stride", type=int, default=1, help="keep every n-th position")
+    parser.add_argument("--fit", action="store_true", help="fit the learned evaluator's weights")
+    parser.add_argument("--weights", help="where --fit saves the weights (default the learned evaluator's)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    total = buildDataset(args.records, args.out_dir, args.workers, args.games_per_shard, args.stride)
+    elapsed = time.perf_counter() - start
+    print(f"{total} positions in {elapsed:.1f} s ({total / elapsed:.0f} positions/s)")
+    if args.fit:
+        path = args.weights or os.path.join(os.path.dirname(os.path.abspath(__file__)), LEARNED_WEIGHTS_PATH)
+        weights = fitWeights(args.out_dir, path)
+        for name, weight in zip(FEATURES, weights):
+            print(f"  {name:18} {weight:+.4f}")
+        print(f"Wrote {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,559 @@
+import copy
+import math
+import os
+import zlib
+
+from .constants import *
+from .state import RED, WALKS, POWER_MASK, isSpawn, maskCells
+from .attacks import AttackMaps, orderMoves, captureMoves
+from .symmetry import stateHash, updateStateHash, rawKey, canonicalKey, SIDE_KEY, WORD_MASK
+from .transposition import TranspositionTable
+from .evalcache import EvalCache
+
+# Search core shared by every agent. Searches and evaluators are registered
+# by name and combined at Engine construction, so the agent, the benchmarks
+# and the match runner can swap them without copies of the search, and
+# greedy_agent scores its moves with an evaluator from here. Everything works
+# on the compact State; scores are from the side to move's point of view
+# (negamax).
+
+# Per engine options, see Engine
+OPTIONS = ["depth", "null_move", "late_move_reductions", "futility", "quiescence", "canonical_keys",
+           "canonical_eval_keys"]
+
+# name -> search(engine, node, depth) returning a move code
+SEARCHES = {}
+# name -> (evaluate(state, maps), score of a lead of one power, largest score
+# gain of a quiet move or None if unbounded)
+EVALUATORS = {}
+
+
+def registerSearch(name):
+    def register(search):
+        SEARCHES[name] = search
+        return search
+    return register
+
+
+def registerEvaluator(name, scale, quiet_gain=None):
+    def register(evaluate):
+        EVALUATORS[name] = (evaluate, scale, quiet_gain)
+        return evaluate
+    return register
+
+
+class Node:
+    """
+    State searched by an engine, with its attack maps and hash kept in step
+    through push and pop. Searches that neither order moves nor
+    use the greedy evaluator can leave the attack maps out.
+    """
+
+    def __init__(self, state, attacks=True):
+        self.state = state.copy()
+        self.maps = AttackMaps(self.state) if attacks else None
+        self.zhash = stateHash(self.state)
+        self.history = []
+
+    def push(self, move):
+        changes = self.state.apply(move)
+        if self.maps is not None:
+            self.maps.update(changes)
+        self.history.append((changes, self.zhash))
+        self.zhash = updateStateHash(self.zhash, changes)
+
+    def pop(self):
+        changes, self.zhash = self.history.pop()
+        if self.maps is not None:
+            self.maps.revert(changes)
+        self.state.undo(changes)
+
+    def pushNull(self):
+        """
+        Pass the turn without moving, for null move pruning
+        """
+        self.state.turn = 1 - self.state.turn
+        self.zhash ^= SIDE_KEY
+
+    def popNull(self):
+        self.state.turn = 1 - self.state.turn
+        self.zhash ^= SIDE_KEY
+
+    def orderedMoves(self):
+        """
+        Moves in search order and the number of captures at their front; the
+        moves after them are quiet
+        """
+        state = self.state
+        return orderMoves(state, self.maps, state.legalMoves())
+
+
+class Engine:
+    """
+    A search backend and an evaluator with their transposition table and
+    evaluation cache. Engines may share a table and cache if they also
+    share the evaluator.
+    """
+
+    def __init__(self, search=None, evaluator=None, depth=None, table=None, eval_cache=None,
+                 null_move=None, late_move_reductions=None, futility=None, quiescence=None,
+                 canonical_keys=None, canonical_eval_keys=None):
+        search = search or ENGINE_SEARCH
+        evaluator = evaluator or ENGINE_EVALUATOR
+        if search not in SEARCHES:
+            raise ValueError(f"Unknown search {search!r}, expected one of {sorted(SEARCHES)}")
+        if evaluator not in EVALUATORS:
+            raise ValueError(f"Unknown evaluator {evaluator!r}, expected one of {sorted(EVALUATORS)}")
+        self.search_name = search
+        self.evaluator_name = evaluator
+        self.search = SEARCHES[search]
+        self.evaluator, self.scale, self.quiet_gain = EVALUATORS[evaluator]
+        if evaluator == "learned":
+            learnedWeights()
+        self.depth = SEARCH_DEPTH if depth is None else depth
+        self.table = TranspositionTable(TT_SIZE) if table is None else table
+        self.eval_cache = EvalCache(EVAL_CACHE_BYTES) if eval_cache is None else eval_cache
+        # Selective search and extension switches, defaulting to the USE_* constants
+        self.null_move = USE_NULL_MOVE if null_move is None else null_move
+        self.late_move_reductions = USE_LATE_MOVE_REDUCTIONS if late_move_reductions is None else late_move_reductions
+        # Futility pruning is only sound with a bound on what a quiet move gains
+        self.futility = (USE_FUTILITY_PRUNING if futility is None else futility) and self.quiet_gain is not None
+        self.quiescence = USE_QUIESCENCE if quiescence is None else quiescence
+        self.canonical_keys = USE_CANONICAL_KEYS if canonical_keys is None else canonical_keys
+        self.canonical_eval_keys = CANONICAL_EVAL_KEYS if canonical_eval_keys is None else canonical_eval_keys
+        # Keys are salted per evaluator, whose scores differ for one position
+        self.salt = zlib.crc32(evaluator.encode()) * 0x9E3779B97F4A7C15 & WORD_MASK
+        self.nodes = 0
+
+    @property
+    def name(self):
+        return f"{self.search_name}/{self.evaluator_name}"
+
+    def configured(self, **options):
+        """
+        Copy of the engine with some OPTIONS changed, sharing its tables and
+        evaluation cache
+        """
+        unknown = set(options) - set(OPTIONS)
+        if unknown:
+            raise ValueError(f"Unknown engine options {sorted(unknown)}, expected some of {OPTIONS}")
+        engine = copy.copy(self)
+        for name, value in options.items():
+            setattr(engine, name, value)
+        engine.futility = engine.futility and engine.quiet_gain is not None
+        return engine
+
+    def chooseMove(self, state, depth=None):
+        """
+        Best move code for the side to move of a State
+        """
+        return self.search(self, Node(state), self.depth if depth is None else depth)
+
+    def tableKey(self, zhash):
+        if self.canonical_keys:
+            return canonicalKey(zhash) ^ self.salt
+        return rawKey(zhash) ^ self.salt
+
+    def leafKey(self, zhash):
+        """
+        Evaluation cache key of a position
+        """
+        if self.canonical_eval_keys:
+            return canonicalKey(zhash) ^ self.salt
+        return rawKey(zhash) ^ self.salt
+
+    def evaluate(self, node):
+        """
+        Score of a node for its side to move: exact for finished games,
+        otherwise the evaluator's through the cache
+        """
+        self.nodes += 1
+        state = node.state
+        if state.game_over:
+            result = state.result() if state.turn == RED else -state.result()
+            return result * WIN_SCORE
+        if not USE_EVAL_CACHE:
+            return self.evaluator(state, node.maps)
+        key = self.leafKey(node.zhash)
+        value = self.eval_cache.get(key)
+        if value is None:
+            value = self.evaluator(state, node.maps)
+            self.eval_cache.put(key, value)
+        return value
+
+
+def isTerminal(node):
+    return node.state.game_over
+
+
+def quiescence(engine, node, alpha, beta, depth):
+    """
+    Value of a leaf once its captures are played out, for up to depth plies,
+    so it is not scored in the middle of an exchange. The side to move may
+    stand pat on the static evaluation instead of capturing.
+    """
+    stand_pat = engine.evaluate(node)
+    if depth <= 0 or isTerminal(node) or stand_pat >= beta:
+        return stand_pat
+    alpha = max(alpha, stand_pat)
+    for move in captureMoves(node.state, node.maps):
+        node.push(move)
+        value = -quiescence(engine, node, -beta, -alpha, depth - 1)
+        node.pop()
+        if value >= beta:
+            return value
+        alpha = max(alpha, value)
+    return alpha
+
+
+def leafValue(engine, node, alpha, beta):
+    """
+    Value of a node at the search horizon
+    """
+    if engine.quiescence and node.maps is not None:
+        return quiescence(engine, node, alpha, beta, QUIESCENCE_DEPTH)
+    return engine.evaluate(node)
+
+
+def nullMoveValue(engine, node, depth, alpha, beta, value_fn):
+    """
+    Let the side to move pass. If its position still fails high, confirm
+    with a reduced search of its real moves and return the cutoff value.
+    Returns None when the node must be searched normally.
+    """
+    if not engine.null_move or depth < NULL_MOVE_MIN_DEPTH:
+        return None
+    state = node.state
+    # Zugzwang safeguard: with few tokens every move can be worse than passing
+    if state.masks[state.turn].bit_count() < NULL_MOVE_MIN_TOKENS:
+        return None
+    node.pushNull()
+    value = -value_fn(engine, node, depth - 1 - NULL_MOVE_REDUCTION, -beta, -alpha, allow_null=False)
+    node.popNull()
+    if value < beta:
+        return None
+    value = value_fn(engine, node, depth - NULL_MOVE_REDUCTION, alpha, beta, allow_null=False)
+    if value < beta:
+        return None
+    return value
+
+
+def isFutile(engine, node, depth, alpha):
+    """
+    True at the frontier when the static evaluation is too far below alpha
+    for a quiet move to reach it
+    """
+    return (engine.futility and depth == 1
+            and engine.evaluate(node) + engine.quiet_gain <= alpha)
+
+
+def lateMoveReduction(engine, depth, index, move, quiet):
+    """
+    Depth reduction for a quiet spawn ordered late in the move list
+    """
+    if (engine.late_move_reductions and depth >= LMR_MIN_DEPTH and index >= LMR_FULL_MOVES
+            and quiet and isSpawn(move)):
+        return LMR_REDUCTION
+    return 0
+
+
+def negamax(engine, node, depth, alpha, beta, allow_null=True):
+    """
+    Fail-hard alpha-beta value of a node, through the transposition table
+    """
+    if depth <= 0 or isTerminal(node):
+        return leafValue(engine, node, alpha, beta)
+    key = engine.tableKey(node.zhash)
+    value = engine.table.probe(key, depth, alpha, beta)
+    if value is not None:
+        return value
+    if allow_null:
+        value = nullMoveValue(engine, node, depth, alpha, beta, negamax)
+        if value is not None:
+            return value
+    alpha_orig = alpha
+    futile = isFutile(engine, node, depth, alpha)
+    moves, captures = node.orderedMoves()
+    for i, move in enumerate(moves):
+        quiet = i >= captures
+        if futile and quiet:
+            break
+        reduction = lateMoveReduction(engine, depth, i, move, quiet)
+        node.push(move)
+        value = -negamax(engine, node, depth - 1 - reduction, -beta, -alpha)
+        if reduction and value > alpha:
+            # The reduced search failed high, search again at full depth
+            value = -negamax(engine, node, depth - 1, -beta, -alpha)
+        node.pop()
+        if value > alpha:
+            alpha = value
+            if alpha >= beta:
+                break
+    engine.table.store(key, depth, alpha, alpha_orig, beta)
+    return alpha
+
+
+def pvs(engine, node, depth, alpha, beta, allow_null=True):
+    """
+    Principal variation search: the first move gets the full window, the
+    others a null window that is widened only when they beat it
+    """
+    if depth <= 0 or isTerminal(node):
+        return leafValue(engine, node, alpha, beta)
+    key = engine.tableKey(node.zhash)
+    value = engine.table.probe(key, depth, alpha, beta)
+    if value is not None:
+        return value
+    if allow_null:
+        value = nullMoveValue(engine, node, depth, alpha, beta, pvs)
+        if value is not None:
+            return value
+    alpha_orig = alpha
+    futile = isFutile(engine, node, depth, alpha)
+    moves, captures = node.orderedMoves()
+    for i, move in enumerate(moves):
+        quiet = i >= captures
+        if futile and quiet:
+            break
+        node.push(move)
+        if i == 0:
+            value = -pvs(engine, node, depth - 1, -beta, -alpha)
+        else:
+            reduction = lateMoveReduction(engine, depth, i, move, quiet)
+            value = -pvs(engine, node, depth - 1 - reduction, -alpha - PVS_WINDOW, -alpha)
+            if reduction and value > alpha:
+                value = -pvs(engine, node, depth - 1, -alpha - PVS_WINDOW, -alpha)
+            if alpha < value < beta:
+                value = -pvs(engine, node, depth - 1, -beta, -alpha)
+        node.pop()
+        if value > alpha:
+            alpha = value
+            if alpha >= beta:
+                break
+    engine.table.store(key, depth, alpha, alpha_orig, beta)
+    return alpha
+
+
+def rootSearch(engine, node, depth, value_fn):
+    best_move = None
+    alpha = float('-inf')
+    moves, _ = node.orderedMoves()
+    for move in moves:
+        node.push(move)
+        value = -value_fn(engine, node, depth - 1, float('-inf'), -alpha)
+        node.pop()
+        if best_move is None or value > alpha:
+            best_move = move
+            alpha = value
+    return best_move
+
+
+@registerSearch("alphabeta")
+def alphaBetaSearch(engine, node, depth):
+    return rootSearch(engine, node, depth, negamax)
+
+
+@registerSearch("pvs")
+def pvsSearch(engine, node, depth):
+    return rootSearch(engine, node, depth, pvs)
+
+
+# Batched full width search, used by self-play to score the leaves of many
+# games together: expand builds a node's tree down to its leaves, the caller
+# scores them, and resolve backs the scores up.
+
+def expand(engine, node, depth, leaves):
+    """
+    Full width search tree of a node: an exact value for finished games, the
+    index of a position appended to leaves at depth 0 with its engine.leafKey,
+    or a list of (move, subtree) pairs
+    """
+    state = node.state
+    if state.game_over:
+        result = state.result() if state.turn == RED else -state.result()
+        return float(result * WIN_SCORE)
+    if depth == 0:
+        leaves.append((bytes(state.cells), state.turn, engine.leafKey(node.zhash)))
+        return len(leaves) - 1
+    children = []
+    for move in state.legalMoves():
+        node.push(move)
+        children.append((move, expand(engine, node, depth - 1, leaves)))
+        node.pop()
+    return children
+
+
+def deepen(engine, node, tree, leaves):
+    """
+    Extend a tree from expand of a node by one ply: every leaf is expanded
+    and the new frontier appended to leaves
+    """
+    if isinstance(tree, float):
+        return tree
+    if isinstance(tree, int):
+        return expand(engine, node, 1, leaves)
+    children = []
+    for move, subtree in tree:
+        node.push(move)
+        children.append((move, deepen(engine, node, subtree, leaves)))
+        node.pop()
+    return children
+
+
+def resolve(tree, values):
+    """
+    Negamax value of a tree from expand, for the side to move at its root
+    """
+    if isinstance(tree, float):
+        return tree
+    if isinstance(tree, int):
+        return values[tree]
+    return max(-resolve(subtree, values) for _, subtree in tree)
+
+
+class TreeNode:
+    """
+    MCTS statistics of a position. wins are counted for the side that moved
+    into it.
+    """
+    __slots__ = ("untried", "children", "visits", "wins")
+
+    def __init__(self, node):
+        self.untried = [] if isTerminal(node) else node.orderedMoves()[0][::-1]
+        self.children = {}
+        self.visits = 0
+        self.wins = 0.0
+
+    def select(self):
+        log_visits = math.log(self.visits)
+        best_move, best_score = None, float('-inf')
+        for move, child in self.children.items():
+            score = child.wins / child.visits + MCTS_EXPLORATION * math.sqrt(log_visits / child.visits)
+            if score > best_score:
+                best_move, best_score = move, score
+        return best_move
+
+
+@registerSearch("mcts")
+def mctsSearch(engine, node, depth):
+    """
+    UCT with evaluator leaves instead of random playouts. The evaluation of a
+    new leaf is squashed to a win probability. depth is not used, the search
+    runs MCTS_ITERATIONS iterations.
+    """
+    root = TreeNode(node)
+    temperature = engine.scale * MCTS_TEMPERATURE
+    for _ in range(MCTS_ITERATIONS):
+        tree = root
+        path = [tree]
+        # Select down to a node with untried moves, then expand one of them
+        while not tree.untried and tree.children:
+            move = tree.select()
+            node.push(move)
+            tree = tree.children[move]
+            path.append(tree)
+        if tree.untried:
+            move = tree.untried.pop()
+            node.push(move)
+            child = TreeNode(node)
+            tree.children[move] = child
+            path.append(child)
+
+        value = max(min(engine.evaluate(node) / temperature, 50), -50)
+        # Win probability for the side that moved into the leaf
+        reward = 1 / (1 + math.exp(value))
+        for tree in reversed(path):
+            tree.visits += 1
+            tree.wins += reward
+            reward = 1 - reward
+        for _ in range(len(path) - 1):
+            node.pop()
+    return max(root.children.items(), key=lambda item: item[1].visits)[0]
+
+
+@registerEvaluator("utility", scale=EAT_WEIGHT, quiet_gain=FUTILITY_MARGIN * EAT_WEIGHT)
+def utilityEvaluator(state, maps):
+    """
+    Weighted power difference
+    """
+    return EAT_WEIGHT * (state.colourPower(state.turn) - state.colourPower(1 - state.turn))
+
+
+@registerEvaluator("greedy", scale=0.3)
+def greedyEvaluator(state, maps):
+    """
+    Power, token, capture and ally spread differences with greedy_agent's
+    weights, counting every cell each spread reaches. A quiet move can
+    change the capture and ally spread counts of many stacks, so it has no
+    quiet move bound.
+    """
+    turn = state.turn
+    opponent = 1 - turn
+    power_diff = state.colourPower(turn) - state.colourPower(opponent)
+    token_diff = state.masks[turn].bit_count() - state.masks[opponent].bit_count()
+    capture_diff = maps.captureCount(state, turn) - maps.captureCount(state, opponent)
+    ally_diff = maps.allySpreadCount(state, turn) - maps.allySpreadCount(state, opponent)
+    return 0.2 * power_diff + 0.1 * token_diff + 0.6 * capture_diff + 0.4 * ally_diff
+
+
+def _adjacentCounts(state, colour):
+    """
+    greedy_agent's capture and ally counts: each spread of a stack counts
+    the adjacent cell in its direction once per power of the stack
+    """
+    cells = state.cells
+    enemy = state.masks[1 - colour]
+    own = state.masks[colour]
+    captures = allies = 0
+    for cell in maskCells(own):
+        power = cells[cell] & POWER_MASK
+        for walk in WALKS[cell]:
+            if enemy >> walk[0] & 1:
+                captures += power
+            elif own >> walk[0] & 1:
+                allies += power
+    return captures, allies
+
+
+@registerEvaluator("greedy_agent", scale=0.3)
+def greedyAgentEvaluator(state, maps):
+    """
+    greedy_agent's own evaluate, kept exactly so the baseline opponent does
+    not change: as greedy, but with the capture and ally counts of
+    _adjacentCounts
+    """
+    turn = state.turn
+    opponent = 1 - turn
+    power_diff = state.colourPower(turn) - state.colourPower(opponent)
+    token_diff = state.masks[turn].bit_count() - state.masks[opponent].bit_count()
+    captures, allies = _adjacentCounts(state, turn)
+    opponent_captures, opponent_allies = _adjacentCounts(state, opponent)
+    return (0.2 * power_diff + 0.1 * token_diff + 0.6 * (captures - opponent_captures)
+            + 0.4 * (allies - opponent_allies))
+
+
+_learned_weights = None
+
+
+def learnedWeights():
+    """
+    Feature weights fitted by dataset.fitWeights, loaded on first use
+    """
+    global _learned_weights
+    if _learned_weights is None:
+        import numpy as np
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), LEARNED_WEIGHTS_PATH)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No learned weights at {path}, fit them with "
+                                    f"python -m agent.dataset <records> <out_dir> --fit")
+        _learned_weights = np.load(path)
+    return _learned_weights
+
+
+@registerEvaluator("learned", scale=0.1)
+def learnedEvaluator(state, maps):
+    """
+    Linear model over features.FEATURES
+    """
+    from .features import stateFeatures
+    return float(stateFeatures(state) @ learnedWeights())
@@ -0,0 +1,86 @@
+from array import array
+
+from .constants import *
+
+# Bytes used per cache entry (key and value) and per set (LRU way)
+ENTRY_BYTES = 16
+WAYS = 2
+SET_BYTES = WAYS * ENTRY_BYTES + 1
+
+
+class EvalCache:
+    """
+    Fixed size cache of evaluations keyed by 64 bit position hashes.
+
+    Entries live in flat arrays organised as 2-way sets: a key can only be
+    stored in the two slots of set (key % num_sets), and a miss replaces
+    the least recently used of the two. Key 0 marks an empty slot. The set
+    count is not rounded to a power of two, so the cache fills its budget.
+    """
+
+    def __init__(self, budget_bytes=EVAL_CACHE_BYTES):
+        self.resize(budget_bytes)
+
+    def resize(self, budget_bytes):
+        """
+        Reallocate for a new byte budget, dropping every entry
+        """
+        num_sets = max(budget_bytes // SET_BYTES, 1)
+        self.num_sets = num_sets
+        self.keys = array("Q", [0]) * (num_sets * WAYS)
+        self.values = array("d", [0.0]) * (num_sets * WAYS)
+        self.recent = bytearray(num_sets)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def nbytes(self):
+        return len(self.keys) * ENTRY_BYTES + len(self.recent)
+
+    def get(self, key):
+        """
+        Cached value for key, or None
+        """
+        key = key or 1
+        index = key % self.num_sets
+        slot = index * WAYS
+        keys = self.keys
+        if keys[slot] == key:
+            self.recent[index] = 0
+        elif keys[slot + 1] == key:
+            slot += 1
+            self.recent[index] = 1
+        else:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return self.values[slot]
+
+    def put(self, key, value):
+        key = key or 1
+        index = key % self.num_sets
+        slot = index * WAYS
+        keys = self.keys
+        if keys[slot] == key:
+            way = 0
+        elif keys[slot + 1] == key:
+            way = 1
+        else:
+            way = 1 - self.recent[index]
+            if keys[slot + way]:
+                self.evictions += 1
+        keys[slot + way] = key
+        self.values[slot + way] = value
+        self.recent[index] = way
+
+    def hitRate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def clear(self):
+        self.keys = array("Q", [0]) * len(self.keys)
+        self.recent = bytearray(len(self.recent))
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
@@ -0,0 +1,111 @@
+import math
+
+import numpy as np
+
+from .constants import *
+from .state import WALKS, COLOUR_SHIFT, POWER_MASK
+
+# Evaluation features computed for whole batches of positions at once. A batch
+# is an (N, 49) uint8 array of State.cells rows plus an (N,) array of the side
+# to move; every feature is from the side to move's point of view.
+
+FEATURES = [
+    "power_diff",           # total power, player - opponent (utility)
+    "player_tokens",        # occupied cells (utility, greedy)
+    "opponent_tokens",
+    "highest_power",        # highest player stack (utility)
+    "closest_distance",     # closest player/opponent pair (utility)
+    "capture_diff",         # spreads landing on enemy cells, player - opponent (greedy)
+    "ally_spread_diff",     # spreads landing on own cells, player - opponent (greedy)
+]
+NUM_FEATURES = len(FEATURES)
+FEATURE_DTYPE = np.float32
+
+# The engine's hand written evaluators as weights over FEATURES, for scoring
+# batches of positions (see selfplay.py)
+EVALUATOR_WEIGHTS = {
+    "utility": {"power_diff": EAT_WEIGHT},
+    "greedy": {"power_diff": 0.2, "player_tokens": 0.1, "opponent_tokens": -0.1,
+               "capture_diff": 0.6, "ally_spread_diff": 0.4},
+}
+
+# Straight line distance between cells in (r, q) coordinates, without wrapping
+_coords = np.array([divmod(cell, BOARD_SIZE) for cell in range(NUM_CELLS)], dtype=np.float32)
+DISTANCES = np.sqrt(((_coords[:, None, :] - _coords[None, :, :]) ** 2).sum(axis=2))
+# Used when one side has no tokens
+NO_DISTANCE = math.sqrt(2) * BOARD_SIZE
+
+STEPS = np.arange(1, MAX_POWER + 1, dtype=np.uint8)            # (6,)
+
+
+def _reachCounts():
+    """
+    Row (power - 1) * 49 + cell counts the spreads of a stack of that power
+    on that cell landing on each target cell
+    """
+    counts = np.zeros((MAX_POWER, NUM_CELLS, NUM_CELLS), dtype=FEATURE_DTYPE)
+    for cell in range(NUM_CELLS):
+        for walk in WALKS[cell]:
+            for power in range(1, MAX_POWER + 1):
+                for target in walk[:power]:
+                    counts[power - 1, cell, target] += 1
+    return counts.reshape(MAX_POWER * NUM_CELLS, NUM_CELLS)
+
+
+REACH_COUNTS = _reachCounts()                                   # (294, 49)
+
+
+def _reach(source, power, targets):
+    """
+    Count spreads from source cells landing on target cells. The stacks are
+    one-hot encoded by (power, cell) so every count is one matrix product.
+    """
+    stacks = (power[:, None, :] == STEPS[None, :, None]) & source[:, None, :]
+    reached = stacks.reshape(len(power), -1).astype(FEATURE_DTYPE) @ REACH_COUNTS
+    return (reached * targets).sum(axis=1)
+
+
+def batchFeatures(cells, turns):
+    """
+    Feature matrix (N, NUM_FEATURES) for a batch of positions
+    """
+    cells = np.asarray(cells, dtype=np.uint8)
+    turns = np.asarray(turns, dtype=np.uint8)
+    # Signed, so power differences do not wrap around
+    power = (cells & POWER_MASK).astype(np.int16)
+    occupied = cells != 0
+    player = occupied & ((cells >> COLOUR_SHIFT) == turns[:, None])
+    opponent = occupied & ~player
+
+    features = np.empty((len(cells), NUM_FEATURES), dtype=FEATURE_DTYPE)
+    features[:, 0] = np.where(player, power, 0).sum(axis=1) - np.where(opponent, power, 0).sum(axis=1)
+    features[:, 1] = player.sum(axis=1)
+    features[:, 2] = opponent.sum(axis=1)
+    features[:, 3] = np.where(player, power, 0).max(axis=1)
+
+    pairs = player[:, :, None] & opponent[:, None, :]
+    closest = np.where(pairs, DISTANCES[None, :, :], np.inf).min(axis=(1, 2))
+    features[:, 4] = np.where(np.isinf(closest), NO_DISTANCE, closest)
+
+    player_power = np.where(player, power, 0)
+    opponent_power = np.where(opponent, power, 0)
+    features[:, 5] = (_reach(player, player_power, opponent)
+                      - _reach(opponent, opponent_power, player))
+    features[:, 6] = (_reach(player, player_power, player)
+                      - _reach(opponent, opponent_power, opponent))
+    return features
+
+
+def weightVector(evaluator):
+    """
+    Weight vector of a hand written evaluator over FEATURES
+    """
+    weights = EVALUATOR_WEIGHTS[evaluator]
+    return np.array([weights.get(name, 0.0) for name in FEATURES])
+
+
+def stateFeatures(state):
+    """
+    Feature vector of a single State
+    """
+    return batchFeatures(np.frombuffer(state.cells, dtype=np.uint8)[None, :], [state.turn])[0]
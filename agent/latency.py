@@ -0,0 +1,127 @@
+import json
+import os
+from collections import deque
+
+from .constants import *
+from .position import fromBoard
+from .records import decodeAction
+from .state import isSpawn, moveCell, moveDirection
+
+# Search levels from strongest to cheapest. "reduced" searches one ply less
+# with the LATENCY_REDUCED_OPTIONS engine options and "greedy" plays the
+# one-ply move capturing the most enemy tokens.
+LEVELS = ["full", "reduced", "greedy"]
+LATENCY_LOG_ENV = "AGENT_LATENCY_LOG"
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+
+def greedyCapture(game):
+    """
+    One-ply spread capturing the most enemy tokens, or the first legal move
+    """
+    state = fromBoard(game)
+    moves = state.legalMoves()
+    if not moves:
+        return None
+    best_move = moves[0]
+    best_count = 0
+    for move in moves:
+        if isSpawn(move):
+            continue
+        count = state.captureCount(moveCell(move), moveDirection(move))
+        if count > best_count:
+            best_move = move
+            best_count = count
+    return decodeAction(best_move)
+
+
+def searchAtLevel(level, game, search_engine):
+    match level:
+        case "full":
+            return decodeAction(search_engine.chooseMove(fromBoard(game)))
+        case "reduced":
+            reduced = search_engine.configured(depth=max(search_engine.depth - 1, 1), **LATENCY_REDUCED_OPTIONS)
+            return decodeAction(reduced.chooseMove(fromBoard(game)))
+    return greedyCapture(game)
+
+
+class LatencyTracker:
+    """
+    Rolling per move wall times for each search level, and the level
+    decisions made from them
+    """
+
+    def __init__(self):
+        self.times = {level: deque(maxlen=LATENCY_WINDOW) for level in LEVELS}
+        self.decisions = []
+
+    def expected(self, level):
+        """
+        p95 move time of a level. While the full search is being skipped it
+        is estimated from the reduced one, a ply shallower, which is timed on
+        those moves, so the full search is played again once it would fit.
+        The ratio of their median times is used once both have been timed,
+        LATENCY_BRANCHING until then.
+        """
+        if level == "full" and self.decisions and self.decisions[-1]["level"] == "reduced":
+            branching = LATENCY_BRANCHING
+            if self.times["full"]:
+                branching = percentile(self.times["full"], 0.5) / percentile(self.times["reduced"], 0.5)
+            return percentile(self.times["reduced"], 0.95) * branching
+        if self.times[level]:
+            return percentile(self.times[level], 0.95)
+        return LATENCY_PRIORS[level]
+
+    def plan(self, game, time_remaining):
+        """
+        Choose the strongest level whose p95 fits this move's share of the
+        remaining time
+        """
+        if time_remaining is None:
+            return "full", None
+        moves_left = max(min((MAX_TURNS - game.turn_count + 1) // 2, LATENCY_HORIZON_MOVES), 1)
+        budget = time_remaining / moves_left
+        if time_remaining < LATENCY_PANIC_SECONDS:
+            return "greedy", budget
+        for level in LEVELS[:-1]:
+            if self.expected(level) <= LATENCY_SAFETY * budget:
+                return level, budget
+        return "greedy", budget
+
+    def record(self, game, level, budget, time_remaining, elapsed):
+        self.times[level].append(elapsed)
+        self.decisions.append({
+            "turn": game.turn_count,
+            "level": level,
+            "time_remaining": time_remaining,
+            "budget": budget,
+            "elapsed": elapsed,
+        })
+
+    def summary(self):
+        """
+        p50/p95/p99 move time over the window, per level
+        """
+        stats = {}
+        for level, times in self.times.items():
+            if times:
+                stats[level] = {f"p{int(q * 100)}": percentile(times, q) for q in (0.5, 0.95, 0.99)}
+        return stats
+
+    def write(self, path):
+        """
+        Append the decisions of a game as JSON lines, then a line with its
+        move time percentiles
+        """
+        with open(path, "a") as file:
+            for decision in self.decisions:
+                file.write(json.dumps(decision) + "\n")
+            file.write(json.dumps({"summary": self.summary()}) + "\n")
+
+    @staticmethod
+    def logPath():
+        return os.environ.get(LATENCY_LOG_ENV)
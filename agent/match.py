@@ -0,0 +1,141 @@
+# Play agent packages against each other in one process, without the referee
+# program. Run with: python -m agent.match <red> <blue> [--games N] [--record PATH]
+# An agent may be given Agent options after "@", e.g.
+# agent@search=pvs,evaluator=greedy,depth=3 or agent@null_move=True
+
+import argparse
+import ast
+import contextlib
+import importlib
+import io
+import time
+import tracemalloc
+
+from referee.game import PlayerColor, Board
+from .records import GameWriter, encodeAction, decodeAction, boardResult
+
+
+def parseOptions(text):
+    """
+    "search=pvs,depth=3" -> {"search": "pvs", "depth": 3}
+    """
+    options = {}
+    for assignment in filter(None, text.split(",")):
+        name, value = assignment.split("=", 1)
+        try:
+            options[name] = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            options[name] = value
+    return options
+
+
+def loadAgent(name, color, **referee):
+    """
+    Construct the Agent of a package such as "agent", "greedy_agent" or
+    "agent@search=mcts", passing referee arguments such as space_limit
+    """
+    package, _, options = name.partition("@")
+    return importlib.import_module(package).Agent(color, **parseOptions(options), **referee)
+
+
+def setOption(assignment):
+    """
+    Apply a "module.NAME=value" override, e.g. agent.engine.QUIESCENCE_DEPTH=4
+    """
+    target, value = assignment.split("=", 1)
+    module, name = target.rsplit(".", 1)
+    setattr(importlib.import_module(module), name, ast.literal_eval(value))
+
+
+def spaceRemaining(space_limit):
+    """
+    Megabytes left under space_limit by the traced peak, as the referee
+    reports it, or None when memory is not being traced
+    """
+    if not tracemalloc.is_tracing():
+        return None
+    return space_limit - tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+
+
+def playGame(red, blue, writer=None, time_limit=None, verbose=False, opening=(), space_limit=None):
+    """
+    Play one game between two agent packages and return the result
+    (1 red win, -1 blue win, 0 draw). The game starts after the opening move
+    codes, if any, and is appended to writer if given. space_limit (MB) is
+    passed to the agents like the referee's.
+    """
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    init = {} if space_limit is None else {"space_limit": space_limit}
+    with output:
+        agents = {PlayerColor.RED: loadAgent(red, PlayerColor.RED, **init),
+                  PlayerColor.BLUE: loadAgent(blue, PlayerColor.BLUE, **init)}
+        used = {PlayerColor.RED: 0.0, PlayerColor.BLUE: 0.0}
+        board = Board()
+        moves = []
+
+        for move in opening:
+            color = board.turn_color
+            action = decodeAction(move)
+            board.apply_action(action)
+            moves.append(move)
+            for agent in agents.values():
+                agent.turn(color, action)
+
+        while not board.game_over:
+            color = board.turn_color
+            referee = {}
+            if time_limit is not None:
+                referee["time_remaining"] = time_limit - used[color]
+            if space_limit is not None:
+                referee["space_remaining"] = spaceRemaining(space_limit)
+            start = time.perf_counter()
+            action = agents[color].action(**referee)
+            used[color] += time.perf_counter() - start
+
+            board.apply_action(action)
+            moves.append(encodeAction(action))
+            for agent in agents.values():
+                agent.turn(color, action, **referee)
+
+    result = boardResult(board)
+    if writer is not None:
+        writer.write(moves, result)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play agents against each other")
+    parser.add_argument("red")
+    parser.add_argument("blue")
+    parser.add_argument("--games", type=int, default=1)
+    parser.add_argument("--swap", action="store_true", help="alternate colours every game")
+    parser.add_argument("--record", help="append games to this record file")
+    parser.add_argument("--time-limit", type=float)
+    parser.add_argument("--space-limit", type=float, help="megabytes, passed to the agents")
+    parser.add_argument("--set", action="append", default=[], metavar="MODULE.NAME=VALUE",
+                        help="override a module constant, e.g. agent.engine.QUIESCENCE_DEPTH=4")
+    args = parser.parse_args()
+    for assignment in args.set:
+        setOption(assignment)
+
+    writer = GameWriter(args.record) if args.record else None
+    # Score of the first and second named agent
+    scores = [0.0, 0.0]
+    for game in range(args.games):
+        swapped = args.swap and game % 2 == 1
+        red, blue = (args.blue, args.red) if swapped else (args.red, args.blue)
+        result = playGame(red, blue, writer, args.time_limit, space_limit=args.space_limit)
+        first_score = (result + 1) / 2
+        if swapped:
+            first_score = 1 - first_score
+        scores[0] += first_score
+        scores[1] += 1 - first_score
+        print(f"Game {game + 1}: {red} (red) vs {blue} (blue) -> {result:+d}")
+    if writer is not None:
+        writer.close()
+    print(f"{args.red}: {scores[0]}/{args.games}")
+    print(f"{args.blue}: {scores[1]}/{args.games}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+import os
+import tracemalloc
+
+from .constants import *
+
+# Memory budget for the agent's caches. The referee passes its space limit
+# (megabytes) to the agent; caches register with a priority and a share of
+# the budget, and when measured usage nears the limit the lowest priority
+# caches are shrunk, then cleared, before anything the search needs.
+
+MEGABYTE = 1024 * 1024
+
+
+def currentUsage():
+    """
+    Bytes in use: traced memory when tracemalloc is running (as the referee
+    measures it), otherwise the resident set size
+    """
+    if tracemalloc.is_tracing():
+        return tracemalloc.get_traced_memory()[0]
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        # Peak rather than current, the closest portable measure (KiB on Linux)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class Consumer:
+    """
+    A cache under the memory manager. cache needs nbytes and
+    resize(budget_bytes); resizing to 0 frees it down to its minimum.
+    """
+
+    def __init__(self, name, cache, priority, share):
+        self.name = name
+        self.cache = cache
+        self.priority = priority
+        self.share = share
+        self.budget = 0
+
+
+class MemoryManager:
+    """
+    Splits a memory limit between registered caches and shrinks them when
+    usage approaches it
+    """
+
+    def __init__(self, limit_bytes=None):
+        self.limit = limit_bytes
+        # Usage before any cache is sized: interpreter, modules and tables
+        self.baseline = currentUsage()
+        self.consumers = []
+        self.events = []
+        self.peak = self.baseline
+        # Lowest space_remaining the referee has reported
+        self.space_seen = None
+
+    @classmethod
+    def fromReferee(cls, referee):
+        """
+        Manager for the referee's space limit, or an unlimited one
+        """
+        limit = referee.get("space_limit")
+        return cls(int(limit * MEGABYTE) if limit is not None else None)
+
+    def register(self, name, cache, priority, share):
+        """
+        Put a cache under management. Lower priorities are shrunk first.
+        """
+        consumer = Consumer(name, cache, priority, share)
+        self.consumers.append(consumer)
+        self.consumers.sort(key=lambda consumer: consumer.priority)
+        return consumer
+
+    def cacheBudget(self):
+        """
+        Bytes the caches may use together
+        """
+        return max(int(self.limit * MEMORY_CACHE_FRACTION) - self.baseline, 0)
+
+    def allocate(self):
+        """
+        Size every cache to its share of the budget. Does nothing without a
+        limit, so caches keep their default sizes.
+        """
+        if self.limit is None:
+            return
+        budget = self.cacheBudget()
+        total_share = sum(consumer.share for consumer in self.consumers)
+        for consumer in self.consumers:
+            consumer.budget = int(budget * consumer.share / total_share)
+            consumer.cache.resize(consumer.budget)
+
+    def pressure(self, usage, space_remaining=None):
+        """
+        True when usage is above the high water mark, or the referee reports
+        little space left. The referee's figure follows the peak, which
+        shrinking cannot lower, so it only counts when it has fallen since
+        the last check.
+        """
+        if self.limit is None:
+            return False
+        if (space_remaining is not None
+                and space_remaining * MEGABYTE < self.limit * (1 - MEMORY_HIGH_WATER)
+                and (self.space_seen is None or space_remaining < self.space_seen)):
+            return True
+        return usage > self.limit * MEMORY_HIGH_WATER
+
+    def check(self, turn=None, space_remaining=None):
+        """
+        Shrink caches, lowest priority first, until usage is back under the
+        high water mark. Each step halves one cache's budget; a cache already
+        at MEMORY_MIN_CACHE_BYTES is cleared instead. Returns the number of
+        steps taken.
+        """
+        usage = currentUsage()
+        self.peak = max(self.peak, usage)
+        reported = space_remaining
+        steps = 0
+        while self.pressure(usage, space_remaining) and steps < MEMORY_MAX_SHRINK_STEPS:
+            consumer = next((consumer for consumer in self.consumers if consumer.budget > 0), None)
+            if consumer is None:
+                break
+            if consumer.budget > MEMORY_MIN_CACHE_BYTES:
+                consumer.budget //= 2
+                action = "shrink"
+            else:
+                consumer.budget = 0
+                action = "clear"
+            consumer.cache.resize(consumer.budget)
+            usage = currentUsage()
+            self.events.append({"turn": turn, "cache": consumer.name, "action": action,
+                                "budget": consumer.budget, "usage": usage})
+            # The referee's figure does not change until the next move
+            space_remaining = None
+            steps += 1
+        if reported is not None and (self.space_seen is None or reported < self.space_seen):
+            self.space_seen = reported
+        return steps
+
+    def summary(self):
+        return {consumer.name: {"budget": consumer.budget, "bytes": consumer.cache.nbytes}
+                for consumer in self.consumers}
@@ -0,0 +1,120 @@
+import struct
+
+from referee.game import PlayerColor, Board, HexPos, HexDir, CellState, SpawnAction, SpreadAction
+from .constants import *
+from .state import State, RED, BLUE, COLOUR_SHIFT, POWER_MASK
+
+# Compact position format: the 49 State cell bytes (colour << 3 | power),
+# the side to move and the turn count, 52 bytes in all. Records can be
+# concatenated and viewed without copying through numpyView.
+#
+# The text notation lists rows r = 0..6 separated by "/", with a red or blue
+# stack written "r<power>" / "b<power>" and a run of empty cells as its
+# length, followed by the side to move and the turn count:
+#   "7/7/7/3r1b12/7/7/7 r 2"
+
+RECORD = struct.Struct(f"<{NUM_CELLS}sBH")
+RECORD_SIZE = RECORD.size
+COLOUR_LETTERS = "rb"
+
+
+def encodeState(state):
+    return RECORD.pack(bytes(state.cells), state.turn, state.turn_count)
+
+
+def decodeState(data, offset=0):
+    cells, turn, turn_count = RECORD.unpack_from(data, offset)
+    return State(cells, turn, turn_count)
+
+
+def toNotation(state):
+    rows = []
+    for r in range(BOARD_SIZE):
+        row = ""
+        empty = 0
+        for value in state.cells[r * BOARD_SIZE:(r + 1) * BOARD_SIZE]:
+            if not value:
+                empty += 1
+                continue
+            if empty:
+                row += str(empty)
+                empty = 0
+            row += f"{COLOUR_LETTERS[value >> COLOUR_SHIFT]}{value & POWER_MASK}"
+        if empty:
+            row += str(empty)
+        rows.append(row)
+    return f"{'/'.join(rows)} {COLOUR_LETTERS[state.turn]} {state.turn_count}"
+
+
+def fromNotation(text):
+    board, turn, turn_count = text.split()
+    rows = board.split("/")
+    if len(rows) != BOARD_SIZE:
+        raise ValueError(f"Expected {BOARD_SIZE} rows in {text!r}")
+    cells = bytearray()
+    for row in rows:
+        start = len(cells)
+        i = 0
+        while i < len(row):
+            char = row[i]
+            if char.isdigit():
+                cells.extend(bytes(int(char)))
+                i += 1
+            elif char in COLOUR_LETTERS and i + 1 < len(row) and row[i + 1] in "123456":
+                cells.append(COLOUR_LETTERS.index(char) << COLOUR_SHIFT | int(row[i + 1]))
+                i += 2
+            else:
+                raise ValueError(f"Bad cell {row[i:i + 2]!r} in {text!r}")
+        if len(cells) - start != BOARD_SIZE:
+            raise ValueError(f"Row {row!r} does not have {BOARD_SIZE} cells")
+    return State(cells, COLOUR_LETTERS.index(turn), int(turn_count))
+
+
+def fromBoard(board):
+    """
+    Referee Board -> State
+    """
+    cells = bytearray(NUM_CELLS)
+    for pos, cell in board._state.items():
+        if cell.player is not None:
+            colour = RED if cell.player == PlayerColor.RED else BLUE
+            cells[pos.r * BOARD_SIZE + pos.q] = colour << COLOUR_SHIFT | cell.power
+    return State(cells, RED if board.turn_color == PlayerColor.RED else BLUE, board.turn_count)
+
+
+def toBoard(state):
+    """
+    State -> referee Board. The Board's history cannot be rebuilt, so its
+    turn count starts from zero.
+    """
+    colours = (PlayerColor.RED, PlayerColor.BLUE)
+    board = Board({HexPos(*divmod(cell, BOARD_SIZE)): CellState(colours[value >> COLOUR_SHIFT], value & POWER_MASK)
+                   for cell, value in enumerate(state.cells) if value})
+    board._turn_color = colours[state.turn]
+    return board
+
+
+def legalActions(board):
+    """
+    Every legal action for the side to move of a referee Board
+    """
+    actions = []
+    can_spawn = board._total_power < MAX_TOTAL_POWER
+    for pos, state in board._state.items():
+        if state.player is None:
+            if can_spawn:
+                actions.append(SpawnAction(pos))
+        elif state.player == board.turn_color:
+            for direction in HexDir:
+                actions.append(SpreadAction(pos, direction))
+    return actions
+
+
+def numpyView(buffer):
+    """
+    Structured NumPy array over a buffer of records, without copying. Fields
+    are cells (49 uint8), turn and turn_count.
+    """
+    import numpy as np
+    dtype = np.dtype([("cells", np.uint8, NUM_CELLS), ("turn", np.uint8), ("turn_count", "<u2")])
+    return np.frombuffer(buffer, dtype=dtype)
@@ -0,0 +1,168 @@
+import cProfile
+import itertools
+import os
+import pstats
+import signal
+import threading
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+
+from referee.game import PlayerColor
+from .constants import *
+
+# Opt-in per move profiling. Set AGENT_PROFILE to "sample" (statistical, with
+# collapsed stacks for flamegraph tools) or "trace" (cProfile), and optionally
+# AGENT_PROFILE_DIR. Results are grouped by game phase and written when the
+# game ends, to files named by colour, process id and game number within the
+# process, so games served by one process do not overwrite each other.
+PROFILE_ENV = "AGENT_PROFILE"
+PROFILE_DIR_ENV = "AGENT_PROFILE_DIR"
+PHASES = ["opening", "midgame", "endgame"]
+# Games profiled by this process
+_game_numbers = itertools.count()
+
+
+def gamePhase(game):
+    """
+    Phase of a game by its token counts
+    """
+    red_tokens = 0
+    blue_tokens = 0
+    for state in game._state.values():
+        if state.player == PlayerColor.RED:
+            red_tokens += 1
+        elif state.player == PlayerColor.BLUE:
+            blue_tokens += 1
+    # Both sides start with few tokens, so the opening is checked first
+    if red_tokens + blue_tokens < OPENING_TOKENS and game.turn_count < OPENING_TURNS:
+        return "opening"
+    if min(red_tokens, blue_tokens) <= ENDGAME_TOKENS:
+        return "endgame"
+    return "midgame"
+
+
+def collapseStack(frame):
+    """
+    Stack of a frame in collapsed format: outermost;...;innermost
+    """
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class MoveProfiler:
+    """
+    Profiles each move and accumulates the results per game phase
+    """
+
+    def __init__(self, mode, out_dir, name):
+        # Signal handlers can only be installed from the main thread, which
+        # the server's worker thread is not
+        if mode == "sample" and (not hasattr(signal, "setitimer")
+                                 or threading.current_thread() is not threading.main_thread()):
+            mode = "trace"
+        self.mode = mode
+        self.out_dir = out_dir
+        self.name = name
+        self.stacks = defaultdict(Counter)
+        self.stats = {}
+        self.moves = Counter()
+        self.times = defaultdict(list)
+        # Largest traced heap after a move, and largest growth over one move
+        self.heap = defaultdict(int)
+        self.growth = defaultdict(int)
+        # Largest traced peak during a move, and how far it rose above the
+        # heap at the start of the move (transient allocations of the search)
+        self.peak = defaultdict(int)
+        self.transient = defaultdict(int)
+        self._phase = None
+        # tracemalloc is only stopped again if the profiler started it
+        self._tracing = False
+
+    @classmethod
+    def fromEnvironment(cls, name):
+        """
+        Profiler configured by AGENT_PROFILE, or None when profiling is off
+        """
+        mode = os.environ.get(PROFILE_ENV)
+        if not mode:
+            return None
+        return cls(mode, os.environ.get(PROFILE_DIR_ENV, "profiles"),
+                   f"{name}-{os.getpid()}-{next(_game_numbers)}")
+
+    def _sample(self, signum, frame):
+        self.stacks[self._phase][collapseStack(frame)] += 1
+
+    def profile(self, game, fn):
+        """
+        Call fn() for the current move of game under the profiler
+        """
+        phase = self._phase = gamePhase(game)
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracing = True
+        # The peak is only reset if the profiler owns tracing; under the
+        # referee its peak is left intact and a move is only seen to reach a
+        # new peak when it raises the running one
+        if self._tracing:
+            tracemalloc.reset_peak()
+        before, peak_before = tracemalloc.get_traced_memory()
+
+        start = time.perf_counter()
+        if self.mode == "sample":
+            previous = signal.signal(signal.SIGPROF, self._sample)
+            signal.setitimer(signal.ITIMER_PROF, PROFILE_INTERVAL, PROFILE_INTERVAL)
+            try:
+                result = fn()
+            finally:
+                signal.setitimer(signal.ITIMER_PROF, 0)
+                signal.signal(signal.SIGPROF, previous)
+        else:
+            profiler = cProfile.Profile()
+            result = profiler.runcall(fn)
+            if phase in self.stats:
+                self.stats[phase].add(profiler)
+            else:
+                self.stats[phase] = pstats.Stats(profiler)
+
+        self.times[phase].append(time.perf_counter() - start)
+        after, peak_after = tracemalloc.get_traced_memory()
+        self.heap[phase] = max(self.heap[phase], after)
+        self.growth[phase] = max(self.growth[phase], after - before)
+        if self._tracing or peak_after > peak_before:
+            self.peak[phase] = max(self.peak[phase], peak_after)
+            self.transient[phase] = max(self.transient[phase], peak_after - before)
+        self.moves[phase] += 1
+        return result
+
+    def write(self):
+        """
+        Write collapsed stacks or cProfile dumps per phase and a summary
+        """
+        if self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
+        os.makedirs(self.out_dir, exist_ok=True)
+        base = os.path.join(self.out_dir, self.name)
+        for phase, stacks in self.stacks.items():
+            with open(f"{base}-{phase}.collapsed", "w") as file:
+                for stack, count in stacks.most_common():
+                    file.write(f"{stack} {count}\n")
+        for phase, stats in self.stats.items():
+            stats.dump_stats(f"{base}-{phase}.prof")
+
+        with open(f"{base}-summary.txt", "w") as file:
+            for phase in PHASES:
+                times = sorted(self.times[phase])
+                if not times:
+                    continue
+                file.write(f"{phase}: {self.moves[phase]} moves, total {sum(times):.3f} s, "
+                           f"median {times[len(times) // 2]:.3f} s, max {times[-1]:.3f} s, "
+                           f"heap {self.heap[phase] / 1024:.0f} KiB, "
+                           f"max growth {self.growth[phase] / 1024:.0f} KiB, "
+                           f"peak {self.peak[phase] / 1024:.0f} KiB, "
+                           f"max transient {self.transient[phase] / 1024:.0f} KiB\n")
@@ -1,19 +1,72 @@
 # COMP30024 Artificial Intelligence, Semester 1 2023
 # Project Part B: Game Playing Agent
 
+import os
+import time
+
 from referee.game import \
     PlayerColor, Action, SpawnAction, SpreadAction, HexPos, HexDir, Board
-from .minimax import minimaxDecision
+from .engine import Engine
+from .evalcache import EvalCache
+from .memory import MemoryManager
+from .latency import LatencyTracker, searchAtLevel
+from .records import GameWriter, RECORD_ENV, encodeAction, boardResult
+from .profiling import MoveProfiler
+from .constants import *
+
+
+def buildEngine(search: str = None, evaluator: str = None, depth: int = None,
+                null_move: bool = None, late_move_reductions: bool = None, futility: bool = None,
+                **referee: dict):
+    """
+    Engine for an agent and the memory manager of its caches. Caches are
+    sized to the referee's space limit, if it gives one. The eval cache then
+    starts empty so it is never allocated at full size. The selective search
+    switches default to USE_NULL_MOVE, USE_LATE_MOVE_REDUCTIONS and
+    USE_FUTILITY_PRUNING.
+    """
+    memory = MemoryManager.fromReferee(referee)
+    eval_cache = EvalCache(0) if memory.limit is not None else None
+    engine = Engine(search, evaluator, depth, eval_cache=eval_cache, null_move=null_move,
+                    late_move_reductions=late_move_reductions, futility=futility)
+    memory.register("eval_cache", engine.eval_cache,
+                    MEMORY_PRIORITIES["eval_cache"], MEMORY_SHARES["eval_cache"])
+    memory.register("transposition_table", engine.table,
+                    MEMORY_PRIORITIES["transposition_table"], MEMORY_SHARES["transposition_table"])
+    memory.allocate()
+    return engine, memory
 
 
 class Agent:
-    def __init__(self, color: PlayerColor, **referee: dict):
+    def __init__(self, color: PlayerColor, search: str = None, evaluator: str = None,
+                 depth: int = None, null_move: bool = None, late_move_reductions: bool = None,
+                 futility: bool = None, engine: Engine = None, memory: MemoryManager = None,
+                 **referee: dict):
         """
-        Initialise the agent.
+        Initialise the agent. search and evaluator name an engine backend
+        and evaluator (engine.SEARCHES, engine.EVALUATORS), defaulting to
+        ENGINE_SEARCH and ENGINE_EVALUATOR. null_move, late_move_reductions
+        and futility switch the engine's selective search. An engine from
+        buildEngine and its memory manager can be passed instead to share
+        them between games.
         """
         self._color = color
         # Initialise game
         self.game = Board()
+        if engine is None:
+            engine, memory = buildEngine(search, evaluator, depth, null_move,
+                                         late_move_reductions, futility, **referee)
+        self.engine = engine
+        self.memory = MemoryManager() if memory is None else memory
+        # Record the game if AGENT_RECORD_PATH is set. "{color}" in the path
+        # is replaced so two agents in one match do not share a file.
+        record_path = os.environ.get(RECORD_ENV)
+        self.recorder = GameWriter(record_path.format(color=color)) if record_path else None
+        self.moves = []
+        # Profile every move if AGENT_PROFILE is set
+        self.profiler = MoveProfiler.fromEnvironment(color.name.lower())
+        # Move times, used to stay within the referee's time limit
+        self.latency = LatencyTracker()
         match color:
             case PlayerColor.RED:
                 print("Testing: I am playing as red")
@@ -24,11 +77,23 @@ class Agent:
         """
         Return the next action to take.
         """
+        if self.profiler is not None:
+            return self.profiler.profile(self.game, lambda: self.chooseAction(**referee))
+        return self.chooseAction(**referee)
+
+    def chooseAction(self, **referee: dict) -> Action:
+        """
+        Search for the next action.
+        """
         # Spawn in middle if first turn
         if self.game.turn_count == 0:
             return SpawnAction(HexPos(3, 3))
-        depth = 2
-        move = minimaxDecision(depth, self.game)
+        self.memory.check(self.game.turn_count, referee.get("space_remaining"))
+        time_remaining = referee.get("time_remaining")
+        level, budget = self.latency.plan(self.game, time_remaining)
+        start = time.perf_counter()
+        move = searchAtLevel(level, self.game, self.engine)
+        self.latency.record(self.game, level, budget, time_remaining, time.perf_counter() - start)
         return move
 
     def turn(self, color: PlayerColor, action: Action, **referee: dict):
@@ -36,6 +101,16 @@ class Agent:
         Update the agent with the last player's action.
         """
         self.game.apply_action(action)
+        if self.recorder is not None:
+            self.moves.append(encodeAction(action))
+            if self.game.game_over:
+                self.recorder.write(self.moves, boardResult(self.game))
+                self.recorder.close()
+                self.recorder = None
+        if self.profiler is not None and self.game.game_over:
+            self.profiler.write()
+        if self.game.game_over and LatencyTracker.logPath():
+            self.latency.write(LatencyTracker.logPath())
         match action:
             case SpawnAction(cell):
                 print(f"Testing: {color} SPAWN at {cell}")
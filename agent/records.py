@@ -0,0 +1,198 @@
+import fcntl
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from referee.game import PlayerColor, SpawnAction, SpreadAction, HexPos
+from .constants import *
+from .state import State, spawnMove, spreadMove, isSpawn, moveCell, moveDirection
+
+# Binary game records. A record file is a sequence of games, each a fixed
+# header followed by one little-endian unsigned short per move (see state.py
+# for the move encoding). Games are only ever appended, whole, so a crashed
+# game never leaves a partial record behind. A side file "<path>.idx" holds
+# one unsigned 64 bit offset per game, so game ids are simply positions in
+# the index. Several writers may append to one path: each game is written
+# under a lock on the index, data first, so an index entry always points at
+# a complete game.
+
+MAGIC = b"IFXR"
+HEADER = struct.Struct("<4sIHbB")   # magic, game id, move count, result, flags
+OFFSET = struct.Struct("<Q")
+RECORD_ENV = "AGENT_RECORD_PATH"
+
+
+def encodeAction(action):
+    """
+    Referee action -> move code
+    """
+    match action:
+        case SpawnAction(cell):
+            return spawnMove(cell.r * BOARD_SIZE + cell.q)
+        case SpreadAction(cell, direction):
+            return spreadMove(cell.r * BOARD_SIZE + cell.q, DIRECTION_INDEX[direction])
+
+
+def decodeAction(move):
+    """
+    Move code -> referee action
+    """
+    cell = HexPos(*divmod(moveCell(move), BOARD_SIZE))
+    if isSpawn(move):
+        return SpawnAction(cell)
+    return SpreadAction(cell, DIRECTIONS[moveDirection(move)])
+
+
+def boardResult(board):
+    """
+    Record result of a finished referee Board
+    """
+    match board.winner_color:
+        case PlayerColor.RED:
+            return 1
+        case PlayerColor.BLUE:
+            return -1
+    return 0
+
+
+def _packMoves(moves):
+    moves = array("H", moves)
+    if sys.byteorder != "little":
+        moves.byteswap()
+    return moves.tobytes()
+
+
+def indexPath(path):
+    return path + ".idx"
+
+
+class GameWriter:
+    """
+    Append-only writer for a record file and its index, safe to share a
+    path with other writers and processes
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "ab")
+        self.index = open(indexPath(path), "ab")
+
+    def write(self, moves, result):
+        """
+        Append a finished game and return its id
+        """
+        fcntl.flock(self.index, fcntl.LOCK_EX)
+        try:
+            game_id = os.fstat(self.index.fileno()).st_size // OFFSET.size
+            offset = os.fstat(self.file.fileno()).st_size
+            self.file.write(HEADER.pack(MAGIC, game_id, len(moves), result, 0))
+            self.file.write(_packMoves(moves))
+            self.file.flush()
+            self.index.write(OFFSET.pack(offset))
+            self.index.flush()
+        finally:
+            fcntl.flock(self.index, fcntl.LOCK_UN)
+        return game_id
+
+    def close(self):
+        self.file.close()
+        self.index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _readMoves(data):
+    moves = array("H")
+    moves.frombytes(data)
+    if sys.byteorder != "little":
+        moves.byteswap()
+    return moves
+
+
+def readGames(path):
+    """
+    Stream (game id, result, moves) from a record file one game at a time
+    """
+    with open(path, "rb") as file:
+        while True:
+            header = file.read(HEADER.size)
+            if len(header) < HEADER.size:
+                return
+            magic, game_id, count, result, _ = HEADER.unpack(header)
+            if magic != MAGIC:
+                raise ValueError(f"Corrupt game record at offset {file.tell() - HEADER.size}")
+            yield game_id, result, _readMoves(file.read(2 * count))
+
+
+def replay(moves):
+    """
+    Yield the position before every move, then the final position. The same
+    State object is reused, so copy it to keep it.
+    """
+    state = State()
+    for move in moves:
+        yield state
+        state.apply(move)
+    yield state
+
+
+def readPositions(path):
+    """
+    Stream (game id, result, position) for every position of every game
+    """
+    for game_id, result, moves in readGames(path):
+        for state in replay(moves):
+            yield game_id, result, state
+
+
+class GameIndex:
+    """
+    Random access to a record file by game id through memory-mapped files
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._files = [open(path, "rb"), open(indexPath(path), "rb")]
+        self.data = self._map(self._files[0])
+        self.offsets = self._map(self._files[1])
+
+    @staticmethod
+    def _map(file):
+        if os.fstat(file.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self):
+        return len(self.offsets) // OFFSET.size
+
+    def read(self, game_id):
+        """
+        Return (result, moves) of a game
+        """
+        if not 0 <= game_id < len(self):
+            raise IndexError(f"No game {game_id} in {self.path}")
+        (offset,) = OFFSET.unpack_from(self.offsets, game_id * OFFSET.size)
+        magic, stored_id, count, result, _ = HEADER.unpack_from(self.data, offset)
+        if magic != MAGIC or stored_id != game_id:
+            raise ValueError(f"Index of {self.path} does not match game {game_id}")
+        start = offset + HEADER.size
+        return result, _readMoves(self.data[start:start + 2 * count])
+
+    def close(self):
+        for mapped in (self.data, self.offsets):
+            if isinstance(mapped, mmap.mmap):
+                mapped.close()
+        for file in self._files:
+            file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,177 @@
+# Batched self-play: many games played interleaved in one process on the
+# compact State engine. Each round every unfinished game extends its full
+# width search tree by one ply (the subtree of the move it played last round
+# is kept), the new leaves of all games are scored together in NumPy batches,
+# and every game then plays its best move. Finished games are appended to a
+# record file as they end. Each round's leaves are one ply deeper than the
+# last, so the evaluation cache only saves transposed leaves; it is shared so
+# engines for the same evaluator can reuse the scores.
+# Run with: python -m agent.selfplay <games.ifx> [--games N] [--concurrent N]
+
+import argparse
+import random
+import time
+
+import numpy as np
+
+from .constants import *
+from .state import State
+from .engine import Engine, Node, learnedWeights, expand, deepen, resolve
+from .features import batchFeatures, weightVector
+from .records import GameWriter
+
+
+def evaluatorWeights(evaluator):
+    """
+    Weights over features.FEATURES of an engine evaluator
+    """
+    if evaluator == "learned":
+        return learnedWeights()
+    return weightVector(evaluator)
+
+
+class SelfPlayGame:
+    """
+    One game of a self-play batch. It starts with random_plies random moves
+    so the games differ. tree is the search tree below the current position
+    kept from the last move, one ply short of the search depth.
+    """
+
+    def __init__(self, rng, random_plies):
+        # Leaves are featurised in batches, so no attack maps are needed
+        self.node = Node(State(), attacks=False)
+        self.moves = []
+        self.tree = None
+        for _ in range(random_plies):
+            if self.finished:
+                break
+            state = self.node.state
+            self.play(rng.choice(state.legalMoves()))
+
+    @property
+    def finished(self):
+        return self.node.state.game_over
+
+    def play(self, move):
+        self.node.push(move)
+        self.moves.append(move)
+
+    def result(self):
+        return self.node.state.result()
+
+
+class SelfPlay:
+    """
+    Plays games in interleaved batches sharing one evaluation cache. Leaves
+    are keyed by an engine for the same evaluator, so the cache can also be
+    shared with engines searching for it.
+    """
+
+    def __init__(self, evaluator=ENGINE_EVALUATOR, depth=SELFPLAY_DEPTH, eval_cache=None,
+                 random_plies=SELFPLAY_RANDOM_PLIES, seed=0):
+        if depth < 1:
+            raise ValueError(f"Self-play depth must be at least 1, got {depth}")
+        self.weights = evaluatorWeights(evaluator)
+        self.engine = Engine(evaluator=evaluator, depth=depth, eval_cache=eval_cache)
+        self.depth = depth
+        self.eval_cache = self.engine.eval_cache
+        self.random_plies = random_plies
+        self.rng = random.Random(seed)
+        self.positions = 0
+
+    def evaluateLeaves(self, leaves):
+        """
+        Score positions for their side to move, through the cache and in
+        batches of SELFPLAY_BATCH
+        """
+        values = [0.0] * len(leaves)
+        missing = {}
+        for i, (_, _, key) in enumerate(leaves):
+            value = self.eval_cache.get(key)
+            if value is None:
+                missing.setdefault(key, []).append(i)
+            else:
+                values[i] = value
+        keys = list(missing)
+        for start in range(0, len(keys), SELFPLAY_BATCH):
+            batch = keys[start:start + SELFPLAY_BATCH]
+            first = [leaves[missing[key][0]] for key in batch]
+            cells = np.frombuffer(b"".join(leaf[0] for leaf in first), dtype=np.uint8).reshape(-1, NUM_CELLS)
+            turns = np.fromiter((leaf[1] for leaf in first), dtype=np.uint8, count=len(first))
+            scores = (batchFeatures(cells, turns) @ self.weights).tolist()
+            for key, score in zip(batch, scores):
+                self.eval_cache.put(key, score)
+                for i in missing[key]:
+                    values[i] = score
+        self.positions += len(leaves)
+        return values
+
+    def step(self, games):
+        """
+        Play one move in every game
+        """
+        leaves = []
+        trees = []
+        for game in games:
+            if game.tree is None:
+                trees.append(expand(self.engine, game.node, self.depth, leaves))
+            else:
+                trees.append(deepen(self.engine, game.node, game.tree, leaves))
+        values = self.evaluateLeaves(leaves)
+        for game, tree in zip(games, trees):
+            move, game.tree = max(tree, key=lambda child: -resolve(child[1], values))
+            game.play(move)
+
+    def run(self, num_games, concurrent=SELFPLAY_CONCURRENT_GAMES):
+        """
+        Play num_games games, concurrent at a time, yielding (moves, result)
+        for each as it finishes
+        """
+        started = 0
+        active = []
+        while started < num_games or active:
+            while started < num_games and len(active) < concurrent:
+                game = SelfPlayGame(self.rng, self.random_plies)
+                started += 1
+                if game.finished:
+                    yield game.moves, game.result()
+                else:
+                    active.append(game)
+            if not active:
+                continue
+            self.step(active)
+            for game in [game for game in active if game.finished]:
+                active.remove(game)
+                yield game.moves, game.result()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batched self-play")
+    parser.add_argument("record", help="append games to this record file")
+    parser.add_argument("--games", type=int, default=SELFPLAY_CONCURRENT_GAMES)
+    parser.add_argument("--concurrent", type=int, default=SELFPLAY_CONCURRENT_GAMES)
+    parser.add_argument("--depth", type=int, default=SELFPLAY_DEPTH)
+    parser.add_argument("--evaluator", default=ENGINE_EVALUATOR)
+    parser.add_argument("--random-plies", type=int, default=SELFPLAY_RANDOM_PLIES)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    if args.depth < 1:
+        parser.error("--depth must be at least 1")
+
+    selfplay = SelfPlay(args.evaluator, args.depth, random_plies=args.random_plies, seed=args.seed)
+    results = {1: 0, 0: 0, -1: 0}
+    start, cpu_start = time.perf_counter(), time.process_time()
+    with GameWriter(args.record) as writer:
+        for moves, result in selfplay.run(args.games, args.concurrent):
+            game_id = writer.write(moves, result)
+            results[result] += 1
+            print(f"Game {game_id}: {len(moves)} moves -> {result:+d}")
+    elapsed, cpu = time.perf_counter() - start, time.process_time() - cpu_start
+    cache = selfplay.eval_cache
+    print(f"Red {results[1]}, blue {results[-1]}, draws {results[0]}")
+    print(f"{args.games} games in {elapsed:.1f} s: {args.games / cpu * 3600:.0f} games/hour per core, "
+          f"{selfplay.positions / cpu:.0f} leaves/s, cache hit rate {cache.hitRate():.1%}")
+
+
+if __name__ == "__main__":
+    main()
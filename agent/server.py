@@ -0,0 +1,172 @@
+# Serve agent moves over a Unix socket so batch runs reuse one warm process
+# (precomputed tables, transposition table and evaluation cache) instead of
+# importing the agent and rebuilding them for every game. The agent_client
+# package is the matching Agent for the referee.
+#
+# Protocol: one JSON object per line each way. Every request names a game
+# and an op:
+#   {"game": id, "op": "new", "color": "RED", "referee": {...},
+#    "search": name, "evaluator": name,
+#    "options": {"null_move": true, ...}}                    -> {"ok": true}
+#   {"game": id, "op": "action", "referee": {...}}          -> {"move": code}
+#   {"game": id, "op": "turn", "color": "BLUE", "move": code,
+#    "referee": {...}}                                      -> {"ok": true}
+#   {"game": id, "op": "close"}                             -> {"ok": true}
+# search, evaluator and options (the Agent's selective search switches) are
+# optional. Games with the same search, evaluator and options share one
+# engine, so its transposition table and evaluation cache are allocated once
+# for the whole pool, sized to the first game's space limit.
+# Moves use the game record encoding (records.py). Errors come back as
+# {"error": message}.
+#
+# Run with: python -m agent.server [--socket PATH] [--max-sessions N]
+
+import argparse
+import asyncio
+import concurrent.futures
+import importlib
+import json
+import os
+
+from referee.game import PlayerColor
+from .records import encodeAction, decodeAction
+
+SOCKET_ENV = "AGENT_SERVER_SOCKET"
+DEFAULT_SOCKET = "/tmp/inflexion-agent.sock"
+MAX_SESSIONS = 64
+
+
+def socketPath():
+    return os.environ.get(SOCKET_ENV, DEFAULT_SOCKET)
+
+
+class SessionPool:
+    """
+    Live agents by game id, up to a fixed number of concurrent games. Agents
+    share engines when the package provides buildEngine.
+    """
+
+    def __init__(self, package="agent", max_sessions=MAX_SESSIONS):
+        self.module = importlib.import_module(package)
+        self.max_sessions = max_sessions
+        self.sessions = {}
+        # (search, evaluator, options) -> (engine, memory manager)
+        self.engines = {}
+
+    def engine(self, search, evaluator, options, referee):
+        key = (search, evaluator, tuple(sorted(options.items())))
+        if key not in self.engines:
+            self.engines[key] = self.module.buildEngine(search, evaluator, **options, **referee)
+        return self.engines[key]
+
+    def open(self, game_id, color, referee, search=None, evaluator=None, options=None):
+        options = options or {}
+        if game_id in self.sessions:
+            raise ValueError(f"Game {game_id} already open")
+        if len(self.sessions) >= self.max_sessions:
+            raise RuntimeError(f"Server is full ({self.max_sessions} games)")
+        if not hasattr(self.module, "buildEngine"):
+            self.sessions[game_id] = self.module.Agent(color, **options, **referee)
+            return
+        engine, memory = self.engine(search, evaluator, options, referee)
+        self.sessions[game_id] = self.module.Agent(color, engine=engine, memory=memory, **referee)
+
+    def get(self, game_id):
+        try:
+            return self.sessions[game_id]
+        except KeyError:
+            raise ValueError(f"No open game {game_id}") from None
+
+    def close(self, game_id):
+        self.sessions.pop(game_id, None)
+
+
+def handleRequest(pool, request):
+    """
+    Run one request against its game's agent and return the response
+    """
+    game_id = request["game"]
+    referee = request.get("referee", {})
+    match request["op"]:
+        case "new":
+            pool.open(game_id, PlayerColor[request["color"]], referee,
+                      request.get("search"), request.get("evaluator"), request.get("options"))
+            return {"ok": True}
+        case "action":
+            return {"move": encodeAction(pool.get(game_id).action(**referee))}
+        case "turn":
+            pool.get(game_id).turn(PlayerColor[request["color"]], decodeAction(request["move"]), **referee)
+            return {"ok": True}
+        case "close":
+            pool.close(game_id)
+            return {"ok": True}
+    raise ValueError(f"Unknown op {request['op']}")
+
+
+def respond(pool, request):
+    """
+    Response to a request, with any error raised by it as {"error": message}
+    """
+    try:
+        return handleRequest(pool, request)
+    except Exception as e:
+        return {"error": f"{type(e).__name__}: {e}"}
+
+
+async def serveClient(pool, executor, reader, writer):
+    """
+    Answer requests from one connection in order. Games it leaves open are
+    closed when it disconnects.
+    """
+    loop = asyncio.get_running_loop()
+    opened = set()
+    try:
+        while line := await reader.readline():
+            try:
+                request = json.loads(line)
+            except ValueError as e:
+                response = {"error": f"{type(e).__name__}: {e}"}
+            else:
+                response = await loop.run_in_executor(executor, respond, pool, request)
+                if "ok" in response and request["op"] == "new":
+                    opened.add(request["game"])
+            writer.write(json.dumps(response).encode() + b"\n")
+            await writer.drain()
+    finally:
+        for game_id in opened:
+            pool.close(game_id)
+        writer.close()
+
+
+async def serve(path, pool):
+    """
+    Serve until cancelled. Games share engines whose caches are not thread
+    safe, so requests from all connections run on one worker thread
+    while the event loop keeps accepting and reading.
+    """
+    if os.path.exists(path):
+        os.unlink(path)
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+    server = await asyncio.start_unix_server(
+        lambda reader, writer: serveClient(pool, executor, reader, writer), path=path)
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve agent moves over a Unix socket")
+    parser.add_argument("--socket", default=socketPath())
+    parser.add_argument("--package", default="agent")
+    parser.add_argument("--max-sessions", type=int, default=MAX_SESSIONS)
+    args = parser.parse_args()
+
+    pool = SessionPool(args.package, args.max_sessions)
+    print(f"Serving {args.package} on {args.socket}")
+    try:
+        asyncio.run(serve(args.socket, pool))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+# Sequential probability ratio test between two agent builds. Games are
+# played in pairs from a shared set of random openings, each build playing
+# both colours, on a pool of worker processes. The test stops as soon as
+# the log-likelihood ratio of "A is elo1 stronger" against "A is elo0
+# stronger" crosses a bound.
+#
+# A build is a package name ("agent", "greedy_agent") or "path:package" to
+# load the package from another checkout, e.g. a git worktree of an older
+# commit: python -m agent.sprt agent /tmp/base:agent --elo1 10
+# Agent options follow "@" as in match.py, e.g. agent@search=pvs agent.
+
+import argparse
+import hashlib
+import importlib.util
+import math
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+from .match import playGame
+from .state import State
+
+OPENING_PLIES = 4
+# Pair scores a pair of games can have, and the pseudo-count of each added to
+# the observed pairs so a run of identical results still has a variance
+PAIR_OUTCOMES = [0.0, 0.5, 1.0, 1.5, 2.0]
+PAIR_PRIOR = 1.0
+
+
+def loadBuild(spec):
+    """
+    Import a build and return the module name to play it under. Builds from
+    another path get their own name so they can sit next to this checkout.
+    """
+    if ":" not in spec:
+        return spec
+    spec, at, options = spec.partition("@")
+    path, package = spec.rsplit(":", 1)
+    path = os.path.abspath(path)
+    alias = f"{package}_{hashlib.sha1(path.encode()).hexdigest()[:8]}"
+    if alias not in sys.modules:
+        package_dir = os.path.join(path, package)
+        module_spec = importlib.util.spec_from_file_location(
+            alias, os.path.join(package_dir, "__init__.py"), submodule_search_locations=[package_dir])
+        module = importlib.util.module_from_spec(module_spec)
+        sys.modules[alias] = module
+        module_spec.loader.exec_module(module)
+    return alias + at + options
+
+
+def randomOpenings(count, plies=OPENING_PLIES, seed=0):
+    """
+    Shared openings, as lists of move codes. Openings that end the game are
+    redrawn, so both builds always get to play.
+    """
+    rng = random.Random(seed)
+    openings = []
+    while len(openings) < count:
+        state = State()
+        moves = []
+        for _ in range(plies):
+            if state.game_over:
+                break
+            move = rng.choice(state.legalMoves())
+            state.apply(move)
+            moves.append(move)
+        if not state.game_over:
+            openings.append(moves)
+    return openings
+
+
+def playPair(task):
+    """
+    Worker: play an opening with both colour assignments and return the
+    score of build A over the two games (0 to 2)
+    """
+    build_a, build_b, opening, time_limit = task
+    a = loadBuild(build_a)
+    b = loadBuild(build_b)
+    score = 0.0
+    score += (playGame(a, b, time_limit=time_limit, opening=opening) + 1) / 2
+    score += (1 - playGame(b, a, time_limit=time_limit, opening=opening)) / 2
+    return score
+
+
+def expectedScore(elo):
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+def scoreElo(score):
+    score = min(max(score, 1e-6), 1 - 1e-6)
+    return -400 * math.log10(1 / score - 1)
+
+
+def llr(pair_scores, elo0, elo1):
+    """
+    Generalised SPRT log-likelihood ratio over pair scores (pentanomial
+    model, normal approximation). PAIR_PRIOR pseudo-pairs of every outcome
+    are mixed in, so one-sided results such as a run of wins still give a
+    finite ratio.
+    """
+    n = len(pair_scores)
+    scores = [score / 2 for score in pair_scores]
+    prior = [score / 2 for score in PAIR_OUTCOMES]
+    total = n + PAIR_PRIOR * len(prior)
+    mean = (sum(scores) + PAIR_PRIOR * sum(prior)) / total
+    variance = (sum((score - mean) ** 2 for score in scores)
+                + PAIR_PRIOR * sum((score - mean) ** 2 for score in prior)) / total
+    s0 = expectedScore(elo0)
+    s1 = expectedScore(elo1)
+    return n * (s1 - s0) * (2 * mean - s0 - s1) / (2 * variance)
+
+
+def eloEstimate(pair_scores):
+    """
+    Elo difference of A over B and its 95% error
+    """
+    n = len(pair_scores)
+    scores = [score / 2 for score in pair_scores]
+    mean = sum(scores) / n
+    deviation = math.sqrt(sum((score - mean) ** 2 for score in scores) / n / n)
+    elo = scoreElo(mean)
+    error = (scoreElo(mean + 1.96 * deviation) - scoreElo(mean - 1.96 * deviation)) / 2
+    return elo, error
+
+
+def runSprt(build_a, build_b, elo0=0.0, elo1=5.0, alpha=0.05, beta=0.05,
+            max_pairs=5000, workers=None, time_limit=None, seed=0, report=print):
+    """
+    Run the test and return "H1" (A is stronger), "H0" (it is not) or
+    "inconclusive", along with the pair scores
+    """
+    lower = math.log(beta / (1 - alpha))
+    upper = math.log((1 - beta) / alpha)
+    tasks = ((build_a, build_b, opening, time_limit) for opening in randomOpenings(max_pairs, seed=seed))
+
+    pair_scores = []
+    verdict = "inconclusive"
+    start = time.perf_counter()
+    with multiprocessing.Pool(workers) as pool:
+        for score in pool.imap_unordered(playPair, tasks):
+            pair_scores.append(score)
+            ratio = llr(pair_scores, elo0, elo1)
+            if ratio >= upper:
+                verdict = "H1"
+            elif ratio <= lower:
+                verdict = "H0"
+            if len(pair_scores) % 10 == 0 or verdict != "inconclusive":
+                elo, error = eloEstimate(pair_scores)
+                games = 2 * len(pair_scores)
+                report(f"{games} games  elo {elo:+.1f} +/- {error:.1f}  "
+                       f"LLR {ratio:.2f} [{lower:.2f}, {upper:.2f}]  "
+                       f"{games / (time.perf_counter() - start):.2f} games/s")
+            if verdict != "inconclusive":
+                pool.terminate()
+                break
+    return verdict, pair_scores
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SPRT between two agent builds")
+    parser.add_argument("build_a")
+    parser.add_argument("build_b")
+    parser.add_argument("--elo0", type=float, default=0.0)
+    parser.add_argument("--elo1", type=float, default=5.0)
+    parser.add_argument("--alpha", type=float, default=0.05)
+    parser.add_argument("--beta", type=float, default=0.05)
+    parser.add_argument("--max-games", type=int, default=10000)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--time-limit", type=float)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    verdict, pair_scores = runSprt(args.build_a, args.build_b, args.elo0, args.elo1, args.alpha,
+                                   args.beta, args.max_games // 2, args.workers, args.time_limit,
+                                   args.seed)
+    elo, error = eloEstimate(pair_scores)
+    print(f"{verdict}: {args.build_a} vs {args.build_b} elo {elo:+.1f} +/- {error:.1f} "
+          f"after {2 * len(pair_scores)} games")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+import random
+
+from .constants import *
+
+# Compact game state used when replaying or generating large numbers of games
+# without the referee Board. Each cell is one byte: 0 when empty, otherwise
+# colour << 3 | power with colour 0 for red and 1 for blue.
+
+RED = 0
+BLUE = 1
+COLOUR_SHIFT = 3
+POWER_MASK = 7
+
+# Moves are small ints: a SPAWN at cell c is c, a SPREAD from cell c in
+# DIRECTIONS[d] is NUM_CELLS + c * 6 + d
+NUM_MOVES = NUM_CELLS + NUM_CELLS * len(DIRECTIONS)
+FULL_MASK = (1 << NUM_CELLS) - 1
+
+
+def spawnMove(cell):
+    return cell
+
+
+def spreadMove(cell, direction):
+    return NUM_CELLS + cell * len(DIRECTIONS) + direction
+
+
+def isSpawn(move):
+    return move < NUM_CELLS
+
+
+def moveCell(move):
+    if move < NUM_CELLS:
+        return move
+    return (move - NUM_CELLS) // len(DIRECTIONS)
+
+
+def moveDirection(move):
+    return (move - NUM_CELLS) % len(DIRECTIONS)
+
+
+def _walks():
+    """
+    WALKS[cell][direction] lists the cells a spread of power 6 would reach,
+    wrapping around the torus
+    """
+    walks = []
+    for cell in range(NUM_CELLS):
+        r, q = divmod(cell, BOARD_SIZE)
+        per_direction = []
+        for direction in DIRECTIONS:
+            per_direction.append(tuple(
+                ((r + i * direction.r) % BOARD_SIZE) * BOARD_SIZE + (q + i * direction.q) % BOARD_SIZE
+                for i in range(1, MAX_POWER + 1)))
+        walks.append(per_direction)
+    return walks
+
+
+WALKS = _walks()
+
+
+def cellsMask(cells):
+    mask = 0
+    for cell in cells:
+        mask |= 1 << cell
+    return mask
+
+
+def maskCells(mask):
+    """
+    Cell indices set in a bitmask
+    """
+    cells = []
+    while mask:
+        low = mask & -mask
+        cells.append(low.bit_length() - 1)
+        mask ^= low
+    return cells
+
+
+def _spreadTables():
+    """
+    SPREAD_CELLS[cell][direction][power] lists the cells a spread of that
+    power reaches and SPREAD_MASKS the same cells as a bitmask (bit i for
+    cell i).
+    """
+    spread_cells = []
+    spread_masks = []
+    for cell in range(NUM_CELLS):
+        cells_by_direction = []
+        masks_by_direction = []
+        for walk in WALKS[cell]:
+            cells_by_power = [walk[:power] for power in range(MAX_POWER + 1)]
+            cells_by_direction.append(cells_by_power)
+            masks_by_direction.append([cellsMask(cells) for cells in cells_by_power])
+        spread_cells.append(cells_by_direction)
+        spread_masks.append(masks_by_direction)
+    return spread_cells, spread_masks
+
+
+SPREAD_CELLS, SPREAD_MASKS = _spreadTables()
+
+
+def cellColour(value):
+    return value >> COLOUR_SHIFT
+
+
+def cellPower(value):
+    return value & POWER_MASK
+
+
+class State:
+    """
+    Board position with the side to move and the number of turns played.
+    masks[colour] is the bitmask of cells held by each colour and
+    total_power the power of every stack, which decides whether spawning is
+    allowed. Both are kept up to date by apply and undo.
+    """
+
+    def __init__(self, cells=None, turn=RED, turn_count=0):
+        self.cells = bytearray(NUM_CELLS) if cells is None else bytearray(cells)
+        self.turn = turn
+        self.turn_count = turn_count
+        self.masks = [0, 0]
+        self.total_power = 0
+        for cell, value in enumerate(self.cells):
+            if value:
+                self.masks[value >> COLOUR_SHIFT] |= 1 << cell
+                self.total_power += value & POWER_MASK
+
+    def copy(self):
+        return State(self.cells, self.turn, self.turn_count)
+
+    def __reduce__(self):
+        # Pickle as the plain cell bytes, e.g. when sent to worker processes
+        return State, (bytes(self.cells), self.turn, self.turn_count)
+
+    def __eq__(self, other):
+        return (isinstance(other, State) and self.cells == other.cells
+                and self.turn == other.turn and self.turn_count == other.turn_count)
+
+    def captureCount(self, cell, direction):
+        """
+        Number of enemy cells a spread from cell would capture
+        """
+        power = self.cells[cell] & POWER_MASK
+        return (SPREAD_MASKS[cell][direction][power] & self.masks[1 - self.turn]).bit_count()
+
+    def colourPower(self, colour):
+        cells = self.cells
+        return sum(cells[cell] & POWER_MASK for cell in maskCells(self.masks[colour]))
+
+    def apply(self, move):
+        """
+        Apply a move for the side to move. The move is assumed legal.
+        Returns the changed cells as (cell, old value, new value) for undo.
+        """
+        turn = self.turn
+        cells = self.cells
+        masks = self.masks
+        if move < NUM_CELLS:
+            changes = [(move, 0, turn << COLOUR_SHIFT | 1)]
+            cells[move] = turn << COLOUR_SHIFT | 1
+            masks[turn] |= 1 << move
+            self.total_power += 1
+        else:
+            cell, direction = divmod(move - NUM_CELLS, len(DIRECTIONS))
+            power = cells[cell] & POWER_MASK
+            changes = [(cell, cells[cell], 0)]
+            cells[cell] = 0
+            # The spread moves its power onto the reached cells one each, so
+            # the total only drops by the stacks pushed past MAX_POWER, which
+            # are removed from the board
+            total_power = self.total_power
+            removed = 1 << cell
+            for target in SPREAD_CELLS[cell][direction][power]:
+                old = cells[target]
+                target_power = old & POWER_MASK
+                if target_power < MAX_POWER:
+                    cells[target] = turn << COLOUR_SHIFT | (target_power + 1)
+                else:
+                    cells[target] = 0
+                    removed |= 1 << target
+                    total_power -= MAX_POWER + 1
+                changes.append((target, old, cells[target]))
+            self.total_power = total_power
+            spread = SPREAD_MASKS[cell][direction][power]
+            masks[turn] = (masks[turn] | spread) & ~removed
+            masks[1 - turn] &= ~spread
+        self.turn = 1 - turn
+        self.turn_count += 1
+        return changes
+
+    def undo(self, changes):
+        """
+        Take back the move that returned changes
+        """
+        cells = self.cells
+        masks = self.masks
+        total_power = self.total_power
+        for cell, old, new in reversed(changes):
+            cells[cell] = old
+            total_power += (old & POWER_MASK) - (new & POWER_MASK)
+            bit = 1 << cell
+            masks[RED] &= ~bit
+            masks[BLUE] &= ~bit
+            if old:
+                masks[old >> COLOUR_SHIFT] |= bit
+        self.total_power = total_power
+        self.turn = 1 - self.turn
+        self.turn_count -= 1
+
+    def legalMoves(self):
+        moves = []
+        if self.total_power < MAX_TOTAL_POWER:
+            moves.extend(maskCells(FULL_MASK & ~(self.masks[RED] | self.masks[BLUE])))
+        for cell in maskCells(self.masks[self.turn]):
+            base = NUM_CELLS + cell * len(DIRECTIONS)
+            moves.extend(range(base, base + len(DIRECTIONS)))
+        return moves
+
+    @property
+    def game_over(self):
+        if self.turn_count < 2:
+            return False
+        # Every stack has power, so a colour has none only when it has no cells
+        return self.turn_count >= MAX_TURNS or not self.masks[RED] or not self.masks[BLUE]
+
+    def result(self):
+        """
+        1 if red won, -1 if blue won, 0 for a draw or an unfinished game
+        """
+        if not self.game_over:
+            return 0
+        diff = self.colourPower(RED) - self.colourPower(BLUE)
+        if abs(diff) < WIN_POWER_DIFF:
+            return 0
+        return 1 if diff > 0 else -1
+
+
+def randomWalk(games, track=None, seed=0, undo_rate=0.25):
+    """
+    Seeded random games that undo a move with probability undo_rate. track,
+    if given, builds an incremental structure (e.g. AttackMaps) for each
+    game's State, which is updated or reverted with every change. Yields the
+    State and the structure (or None) after each step.
+    """
+    rng = random.Random(seed)
+    for _ in range(games):
+        state = State()
+        tracked = track(state) if track else None
+        history = []
+        while not state.game_over:
+            if history and rng.random() < undo_rate:
+                changes = history.pop()
+                state.undo(changes)
+                if tracked is not None:
+                    tracked.revert(changes)
+            else:
+                changes = state.apply(rng.choice(state.legalMoves()))
+                if tracked is not None:
+                    tracked.update(changes)
+                history.append(changes)
+            yield state, tracked
@@ -0,0 +1,179 @@
+import random
+import sys
+
+from referee.game import PlayerColor
+from .constants import *
+
+# Symmetries of the 7x7 hex torus: a rotation/reflection of the hex lattice
+# followed by a translation, 12 * 49 = 588 in total. A position is hashed under
+# all of them at once by packing one 64 bit Zobrist word per symmetry into a
+# single Python int, so an incremental update is one big-int XOR and the
+# canonical hash is the smallest packed word.
+
+# 60 degree rotation and reflection in (r, q) axial coordinates. Both map the
+# six HexDir vectors onto each other, so spreads are preserved.
+def rotate(r, q):
+    return -q, r + q
+
+
+def reflect(r, q):
+    return q, r
+
+
+def _linearMaps():
+    maps = []
+    for flip in (False, True):
+        for turns in range(6):
+            def transform(r, q, flip=flip, turns=turns):
+                if flip:
+                    r, q = reflect(r, q)
+                for _ in range(turns):
+                    r, q = rotate(r, q)
+                return r, q
+            maps.append(transform)
+    return maps
+
+
+LINEAR_MAPS = _linearMaps()
+NUM_SYMMETRIES = len(LINEAR_MAPS) * NUM_CELLS
+WORD_BYTES = 8
+PACKED_BYTES = NUM_SYMMETRIES * WORD_BYTES
+WORD_MASK = (1 << 64) - 1
+
+
+def cellIndex(r, q):
+    return r * BOARD_SIZE + q
+
+
+def cellCoords(index):
+    return divmod(index, BOARD_SIZE)
+
+
+def _cellPermutations():
+    """
+    PERMUTATIONS[s][cell] is where symmetry s sends cell. Symmetry 0 is the
+    identity.
+    """
+    perms = []
+    for transform in LINEAR_MAPS:
+        for tr in range(BOARD_SIZE):
+            for tq in range(BOARD_SIZE):
+                perm = []
+                for index in range(NUM_CELLS):
+                    r, q = transform(*cellCoords(index))
+                    perm.append(cellIndex((r + tr) % BOARD_SIZE, (q + tq) % BOARD_SIZE))
+                perms.append(tuple(perm))
+    return perms
+
+
+PERMUTATIONS = _cellPermutations()
+
+
+def pieceIndex(player, power):
+    """
+    Index of a (colour, power) stack among the 12 possible pieces
+    """
+    colour = 0 if player == PlayerColor.RED else 1
+    return colour * MAX_POWER + power - 1
+
+
+def _pack(words):
+    return int.from_bytes(b"".join(w.to_bytes(WORD_BYTES, sys.byteorder) for w in words), sys.byteorder)
+
+
+def _zobristKeys():
+    rng = random.Random(HASH_SEED)
+    keys = [[rng.getrandbits(64) for _ in range(2 * MAX_POWER)] for _ in range(NUM_CELLS)]
+    side = rng.getrandbits(64)
+
+    # PIECE_KEYS[cell][piece] holds the key of the piece as seen by every symmetry
+    packed = [[_pack(keys[perm[cell]][piece] for perm in PERMUTATIONS)
+               for piece in range(2 * MAX_POWER)]
+              for cell in range(NUM_CELLS)]
+    return packed, _pack([side] * NUM_SYMMETRIES)
+
+
+PIECE_KEYS, SIDE_KEY = _zobristKeys()
+
+
+def boardHash(game):
+    """
+    Compute the packed symmetric hash of a board from scratch
+    """
+    packed = 0
+    for pos, state in game._state.items():
+        if state.player is not None:
+            packed ^= PIECE_KEYS[cellIndex(pos.r, pos.q)][pieceIndex(state.player, state.power)]
+    if game.turn_color == PlayerColor.BLUE:
+        packed ^= SIDE_KEY
+    return packed
+
+
+def stateHash(state):
+    """
+    Packed symmetric hash of a compact State, equal to boardHash of the same
+    position
+    """
+    packed = 0
+    for cell, value in enumerate(state.cells):
+        if value:
+            packed ^= PIECE_KEYS[cell][(value >> 3) * MAX_POWER + (value & 7) - 1]
+    if state.turn == 1:
+        packed ^= SIDE_KEY
+    return packed
+
+
+def updateHash(packed, mutation):
+    """
+    Update a packed hash with the BoardMutation returned by apply_action or
+    undo_action
+    """
+    for change in mutation.cell_mutations:
+        index = cellIndex(change.cell.r, change.cell.q)
+        if change.prev.player is not None:
+            packed ^= PIECE_KEYS[index][pieceIndex(change.prev.player, change.prev.power)]
+        if change.next.player is not None:
+            packed ^= PIECE_KEYS[index][pieceIndex(change.next.player, change.next.power)]
+    return packed ^ SIDE_KEY
+
+
+def updateStateHash(packed, changes):
+    """
+    Update a packed hash with the (cell, old, new) changes returned by
+    State.apply or passed to State.undo
+    """
+    for cell, old, new in changes:
+        if old:
+            packed ^= PIECE_KEYS[cell][(old >> 3) * MAX_POWER + (old & 7) - 1]
+        if new:
+            packed ^= PIECE_KEYS[cell][(new >> 3) * MAX_POWER + (new & 7) - 1]
+    return packed ^ SIDE_KEY
+
+
+def rawKey(packed):
+    """
+    Hash of the position itself (the identity symmetry)
+    """
+    return packed & WORD_MASK
+
+
+def _words(packed):
+    return memoryview(packed.to_bytes(PACKED_BYTES, sys.byteorder)).cast("Q")
+
+
+def canonicalKey(packed):
+    """
+    Hash shared by every position equivalent under a torus symmetry
+    """
+    return min(_words(packed))
+
+
+def canonicalSymmetry(packed):
+    """
+    Return (canonical key, symmetry) where symmetry maps the position to its
+    canonical representative
+    """
+    words = _words(packed)
+    key = min(words)
+    return key, words.tolist().index(key)
+
@@ -0,0 +1,76 @@
+import itertools
+
+# Transposition table entry flags
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# Measured bytes per entry: dict slot, 64 bit key and (depth, value, flag)
+ENTRY_BYTES = 180
+
+
+class TranspositionTable:
+    """
+    Fixed capacity table of searched positions. Once full, the oldest entry
+    is dropped to make room.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.entries = {}
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+
+    def probe(self, key, depth, alpha, beta):
+        """
+        Return a stored value usable at this depth and window, or None
+        """
+        self.probes += 1
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        entry_depth, value, flag = entry
+        if entry_depth < depth:
+            return None
+        if flag == EXACT or (flag == LOWER and value >= beta) or (flag == UPPER and value <= alpha):
+            self.hits += 1
+            return value
+        return None
+
+    def store(self, key, depth, value, alpha, beta):
+        """
+        Store a value returned by a search of the window (alpha, beta)
+        """
+        if value <= alpha:
+            flag = UPPER
+        elif value >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        if key not in self.entries and len(self.entries) >= self.capacity:
+            del self.entries[next(iter(self.entries))]
+        self.entries[key] = (depth, value, flag)
+        self.stores += 1
+
+    @property
+    def nbytes(self):
+        return len(self.entries) * ENTRY_BYTES
+
+    def resize(self, budget_bytes):
+        """
+        Change the capacity to fit a byte budget, keeping the newest entries
+        """
+        self.capacity = max(budget_bytes // ENTRY_BYTES, 1)
+        excess = len(self.entries) - self.capacity
+        if excess > 0:
+            self.entries = dict(itertools.islice(self.entries.items(), excess, None))
+
+    def hitRate(self):
+        return self.hits / self.probes if self.probes else 0.0
+
+    def clear(self):
+        self.entries.clear()
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
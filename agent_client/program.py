@@ -0,0 +1,88 @@
+# COMP30024 Artificial Intelligence, Semester 1 2023
+# Project Part B: Game Playing Agent
+
+import json
+import os
+import socket
+import uuid
+
+from referee.game import PlayerColor, Action, SpawnAction, SpreadAction, HexPos, HexDir
+
+
+# Thin client for a running agent server (python -m agent.server). Moves are
+# searched by the server's warm agent, so this package can be given to the
+# referee in place of agent without rebuilding its tables every game. It does
+# not import agent, so each game starts without loading the search; the
+# socket path and move encoding below must match agent.server and
+# agent.records.
+
+SOCKET_ENV = "AGENT_SERVER_SOCKET"
+DEFAULT_SOCKET = "/tmp/inflexion-agent.sock"
+BOARD_SIZE = 7
+NUM_CELLS = BOARD_SIZE * BOARD_SIZE
+DIRECTIONS = [HexDir.Up, HexDir.UpRight, HexDir.UpLeft, HexDir.Down, HexDir.DownLeft, HexDir.DownRight]
+
+
+def encodeAction(action):
+    """
+    Referee action -> move code: the cell for a spawn, then one code per
+    cell and direction for spreads
+    """
+    match action:
+        case SpawnAction(cell):
+            return cell.r * BOARD_SIZE + cell.q
+        case SpreadAction(cell, direction):
+            return NUM_CELLS + (cell.r * BOARD_SIZE + cell.q) * len(DIRECTIONS) + DIRECTIONS.index(direction)
+
+
+def decodeAction(move):
+    """
+    Move code -> referee action
+    """
+    if move < NUM_CELLS:
+        return SpawnAction(HexPos(*divmod(move, BOARD_SIZE)))
+    cell, direction = divmod(move - NUM_CELLS, len(DIRECTIONS))
+    return SpreadAction(HexPos(*divmod(cell, BOARD_SIZE)), DIRECTIONS[direction])
+
+
+class Agent:
+    def __init__(self, color: PlayerColor, **referee: dict):
+        """
+        Initialise the agent.
+        """
+        self._color = color
+        self.game_id = uuid.uuid4().hex
+        self.connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.connection.connect(os.environ.get(SOCKET_ENV, DEFAULT_SOCKET))
+        self.responses = self.connection.makefile("rb")
+        self.request("new", color=color.name, referee=referee)
+
+    def request(self, op, **fields):
+        """
+        Send a request for this game and wait for the response
+        """
+        message = {"game": self.game_id, "op": op, **fields}
+        self.connection.sendall(json.dumps(message).encode() + b"\n")
+        response = json.loads(self.responses.readline())
+        if "error" in response:
+            raise RuntimeError(f"Agent server: {response['error']}")
+        return response
+
+    def action(self, **referee: dict) -> Action:
+        """
+        Return the next action to take.
+        """
+        return decodeAction(self.request("action", referee=referee)["move"])
+
+    def turn(self, color: PlayerColor, action: Action, **referee: dict):
+        """
+        Update the agent with the last player's action.
+        """
+        self.request("turn", color=color.name, move=encodeAction(action), referee=referee)
+
+    def __del__(self):
+        try:
+            self.request("close")
+            self.connection.close()
+        except (OSError, ValueError, RuntimeError):
+            pass
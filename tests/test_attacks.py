@@ -0,0 +1,8 @@
+from agent.attacks import AttackMaps
+from agent.state import randomWalk
+
+
+def test_attack_maps_match_a_rebuild_across_apply_and_undo():
+    for state, maps in randomWalk(3, AttackMaps):
+        rebuilt = AttackMaps(state)
+        assert (maps.counts, maps.reach) == (rebuilt.counts, rebuilt.reach)
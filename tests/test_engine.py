@@ -0,0 +1,85 @@
+import random
+
+import pytest
+
+from agent import engine
+from agent.engine import Engine, Node
+from agent.state import State
+from agent.symmetry import canonicalKey, rawKey, stateHash
+
+SELECTIVE_OPTIONS = ["null_move", "late_move_reductions", "futility"]
+
+
+def randomStates(count, plies, seed=0):
+    rng = random.Random(seed)
+    states = []
+    while len(states) < count:
+        state = State()
+        for _ in range(plies):
+            if state.game_over:
+                break
+            state.apply(rng.choice(state.legalMoves()))
+        if not state.game_over:
+            states.append(state)
+    return states
+
+
+def test_null_move_restores_the_node():
+    state = randomStates(1, 8)[0]
+    node = Node(state)
+    zhash = node.zhash
+    node.pushNull()
+    assert node.state.turn != state.turn
+    assert node.zhash == stateHash(node.state)
+    node.popNull()
+    assert node.state == state
+    assert node.zhash == zhash
+
+
+def test_alphabeta_and_pvs_agree():
+    alphabeta = Engine("alphabeta", depth=3)
+    pvs = Engine("pvs", depth=3)
+    for state in randomStates(4, 10):
+        assert alphabeta.chooseMove(state) == pvs.chooseMove(state)
+
+
+@pytest.mark.parametrize("search", ["alphabeta", "pvs"])
+@pytest.mark.parametrize("option", SELECTIVE_OPTIONS + ["quiescence"])
+def test_selective_options_play_legal_moves(search, option, monkeypatch):
+    monkeypatch.setattr(engine, "NULL_MOVE_MIN_DEPTH", 2)
+    monkeypatch.setattr(engine, "LMR_FULL_MOVES", 1)
+    search_engine = Engine(search, depth=3, **{name: name == option for name in SELECTIVE_OPTIONS + ["quiescence"]})
+    for state in randomStates(2, 10):
+        node = Node(state)
+        zhash = node.zhash
+        assert search_engine.search(search_engine, node, 3) in state.legalMoves()
+        assert node.state == state
+        assert node.zhash == zhash
+
+
+def test_quiet_moves_stay_within_the_futility_margin():
+    for name, (evaluate, _, quiet_gain) in engine.EVALUATORS.items():
+        if quiet_gain is None:
+            continue
+        for state in randomStates(20, 12):
+            node = Node(state)
+            before = evaluate(node.state, node.maps)
+            moves, captures = node.orderedMoves()
+            for move in moves[captures:]:
+                node.push(move)
+                assert -evaluate(node.state, node.maps) - before <= quiet_gain, name
+                node.pop()
+
+
+def test_futility_needs_a_quiet_move_bound():
+    assert Engine("alphabeta", "utility", futility=True).futility
+    assert not Engine("alphabeta", "greedy", futility=True).futility
+
+
+def test_canonical_eval_keys_are_an_engine_option():
+    zhash = Node(randomStates(1, 6)[0]).zhash
+    raw = Engine("alphabeta", "utility", canonical_eval_keys=False)
+    canonical = raw.configured(canonical_eval_keys=True)
+    assert raw.leafKey(zhash) == rawKey(zhash) ^ raw.salt
+    assert canonical.leafKey(zhash) == canonicalKey(zhash) ^ raw.salt
+    assert canonical.eval_cache is raw.eval_cache
@@ -0,0 +1,38 @@
+import random
+
+from referee.game import Board, HexDir, PlayerColor
+
+from agent.engine import EVALUATORS
+from agent.position import fromBoard, legalActions
+
+
+def boardEvaluate(board):
+    """
+    greedy_agent's original evaluate on a referee Board: every spread of a
+    stack counts the adjacent cell once per power
+    """
+    totals = {PlayerColor.RED: [0, 0, 0, 0], PlayerColor.BLUE: [0, 0, 0, 0]}
+    for pos, cell in board._state.items():
+        if cell.player is None:
+            continue
+        power, tokens, captures, allies = totals[cell.player]
+        for direction in HexDir:
+            target = board._state[pos + direction].player
+            if target == cell.player.opponent:
+                captures += cell.power
+            elif target == cell.player:
+                allies += cell.power
+        totals[cell.player] = [power + cell.power, tokens + 1, captures, allies]
+    diffs = [red - blue for red, blue in zip(totals[PlayerColor.RED], totals[PlayerColor.BLUE])]
+    evaluation = sum(weight * diff for weight, diff in zip((0.2, 0.1, 0.6, 0.4), diffs))
+    return evaluation if board.turn_color == PlayerColor.RED else -evaluation
+
+
+def test_evaluator_matches_the_original_heuristic():
+    evaluate = EVALUATORS["greedy_agent"][0]
+    rng = random.Random(0)
+    for _ in range(3):
+        board = Board()
+        while not board.game_over:
+            assert abs(evaluate(fromBoard(board), None) - boardEvaluate(board)) < 1e-9
+            board.apply_action(rng.choice(legalActions(board)))
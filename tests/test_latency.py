@@ -0,0 +1,74 @@
+import json
+
+from referee.game import Board, SpreadAction, HexPos, PlayerColor
+
+from agent.engine import Engine
+from agent.latency import LatencyTracker, greedyCapture
+from agent.position import fromNotation, toBoard
+from agent.constants import MAX_TOTAL_POWER, LATENCY_PANIC_SECONDS, LATENCY_REDUCED_OPTIONS
+
+
+def test_greedy_capture_does_not_spawn_at_the_power_cap():
+    # 7 red power against 42 blue, with no red spread reaching a blue stack
+    state = fromNotation("r1r1r1r1r1r1r1/7/b2b2b2b2b2b2b2/b2b2b2b2b2b2b2/b2b2b2b2b2b2b2/7/7 r 10")
+    assert state.total_power >= MAX_TOTAL_POWER
+    board = toBoard(state)
+    action = greedyCapture(board)
+    assert isinstance(action, SpreadAction)
+    board.apply_action(action)
+
+
+def test_greedy_capture_takes_the_most_tokens():
+    # A power 2 spread along row 3 takes both blue stacks
+    board = toBoard(fromNotation("7/7/7/1r2b1b13/7/7/7 r 10"))
+    action = greedyCapture(board)
+    assert action.cell == HexPos(3, 1)
+    board.apply_action(action)
+    assert board[HexPos(3, 2)].player == PlayerColor.RED
+    assert board[HexPos(3, 3)].player == PlayerColor.RED
+
+
+def test_plan_chooses_levels_from_the_time_remaining():
+    tracker = LatencyTracker()
+    board = Board()
+    assert tracker.plan(board, None) == ("full", None)
+    assert tracker.plan(board, 1000.0)[0] == "full"
+    assert tracker.plan(board, LATENCY_PANIC_SECONDS / 2)[0] == "greedy"
+    # Full searches that took 1 s do not fit a 0.5 s share, 0.1 s reduced ones do
+    for _ in range(10):
+        tracker.record(board, "full", None, None, 1.0)
+        tracker.record(board, "reduced", None, None, 0.1)
+    level, budget = tracker.plan(board, 20.0)
+    assert (level, budget) == ("reduced", 0.5)
+    tracker.record(board, "reduced", None, None, 1.0)
+    assert tracker.plan(board, 4.0)[0] == "greedy"
+
+
+def test_reduced_configuration_leaves_the_engine_unchanged():
+    engine = Engine("alphabeta", depth=3, null_move=True, quiescence=True)
+    reduced = engine.configured(depth=2, **LATENCY_REDUCED_OPTIONS)
+    assert (reduced.depth, reduced.null_move, reduced.quiescence) == (2, False, False)
+    assert (engine.depth, engine.null_move, engine.quiescence) == (3, True, True)
+    assert reduced.table is engine.table and reduced.eval_cache is engine.eval_cache
+
+
+def test_decision_log_ends_with_the_move_time_percentiles(tmp_path):
+    tracker = LatencyTracker()
+    board = Board()
+    for elapsed in (0.1, 0.2, 0.3):
+        tracker.record(board, "full", 1.0, 100.0, elapsed)
+    path = tmp_path / "latency.jsonl"
+    tracker.write(str(path))
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [line["elapsed"] for line in lines[:-1]] == [0.1, 0.2, 0.3]
+    assert lines[-1] == {"summary": {"full": {"p50": 0.2, "p95": 0.3, "p99": 0.3}}}
+
+
+def test_plan_moves_up_to_full_once_the_reduced_search_is_timed():
+    tracker = LatencyTracker()
+    board = Board()
+    # A 1.5 s share is too little for the full search's prior, not the reduced one's
+    level, budget = tracker.plan(board, 60.0)
+    assert (level, budget) == ("reduced", 1.5)
+    tracker.record(board, level, budget, 60.0, 0.02)
+    assert tracker.plan(board, 59.0)[0] == "full"
@@ -0,0 +1,52 @@
+import json
+import os
+import subprocess
+import sys
+
+# The referee traces memory from before it imports an agent, so the game is
+# played in a fresh interpreter that starts tracemalloc first. The limit is
+# the import footprint plus SPARE_MB, and the caches are over-committed so
+# the memory manager has to shrink them to stay under it. Tables built at
+# import count against every limit, so their size is capped too.
+SPARE_MB = 2
+IMPORT_MB = 8
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+GAME = """
+import tracemalloc
+tracemalloc.start()
+
+import contextlib
+import io
+import json
+import sys
+
+from referee.game import Board, PlayerColor
+from agent import memory
+from agent.match import spaceRemaining
+from agent.program import Agent
+
+imported = tracemalloc.get_traced_memory()[0] / memory.MEGABYTE
+limit = imported + float(sys.argv[1])
+memory.MEMORY_CACHE_FRACTION = 0.95
+with contextlib.redirect_stdout(io.StringIO()):
+    agents = {color: Agent(color, depth=1, space_limit=limit) for color in PlayerColor}
+    board = Board()
+    while not board.game_over:
+        color = board.turn_color
+        action = agents[color].action(space_remaining=spaceRemaining(limit))
+        board.apply_action(action)
+        for agent in agents.values():
+            agent.turn(color, action)
+print(json.dumps({"imported": imported, "limit": limit, "peak": tracemalloc.get_traced_memory()[1] / memory.MEGABYTE,
+                  "shrinks": sum(len(agent.memory.events) for agent in agents.values())}))
+"""
+
+
+def test_agents_stay_within_the_space_limit():
+    result = subprocess.run([sys.executable, "-c", GAME, str(SPARE_MB)], cwd=REPO,
+                            capture_output=True, text=True, check=True)
+    stats = json.loads(result.stdout)
+    assert stats["imported"] <= IMPORT_MB
+    assert stats["shrinks"] > 0
+    assert stats["peak"] <= stats["limit"]
@@ -0,0 +1,48 @@
+import pytest
+
+from agent.position import (RECORD, RECORD_SIZE, decodeState, encodeState, fromBoard, fromNotation,
+                            numpyView, toBoard, toNotation)
+from agent.state import randomWalk
+
+
+def walkStates(every=20):
+    return [state.copy() for step, (state, _) in enumerate(randomWalk(2)) if step % every == 0]
+
+
+def test_notation_round_trips():
+    assert toNotation(fromNotation("7/7/7/3r1b12/7/7/7 r 2")) == "7/7/7/3r1b12/7/7/7 r 2"
+    for state in walkStates():
+        assert fromNotation(toNotation(state)) == state
+
+
+def test_bad_notation_is_rejected():
+    for text in ["7/7/7/7/7/7 r 0", "7/7/7/8/7/7/7 r 0", "7/7/7/3r71b12/7/7/7 r 0"]:
+        with pytest.raises(ValueError):
+            fromNotation(text)
+
+
+def test_referee_board_round_trips():
+    for state in walkStates():
+        restored = fromBoard(toBoard(state))
+        assert (restored.cells, restored.turn) == (state.cells, state.turn)
+
+
+def test_records_round_trip():
+    states = walkStates()
+    buffer = b"".join(encodeState(state) for state in states)
+    assert len(buffer) == RECORD_SIZE * len(states)
+    for i, state in enumerate(states):
+        assert decodeState(buffer, i * RECORD_SIZE) == state
+
+
+def test_numpy_view_matches_the_records():
+    np = pytest.importorskip("numpy")
+    states = walkStates()
+    buffer = b"".join(encodeState(state) for state in states)
+    view = numpyView(buffer)
+    assert view.itemsize == RECORD.size
+    for record, state in zip(view, states):
+        cells, turn, turn_count = RECORD.unpack(record.tobytes())
+        assert bytes(record["cells"]) == cells == bytes(state.cells)
+        assert (int(record["turn"]), int(record["turn_count"])) == (turn, turn_count) == (state.turn, state.turn_count)
+    assert np.shares_memory(view, np.frombuffer(buffer, dtype=np.uint8))
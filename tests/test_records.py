@@ -0,0 +1,36 @@
+import random
+
+from agent.records import GameIndex, GameWriter, readGames
+from agent.state import State
+
+
+def randomGames(count, seed=0):
+    rng = random.Random(seed)
+    games = []
+    for _ in range(count):
+        state = State()
+        moves = []
+        while not state.game_over and len(moves) < 60:
+            move = rng.choice(state.legalMoves())
+            state.apply(move)
+            moves.append(move)
+        games.append((moves, state.result()))
+    return games
+
+
+def test_games_round_trip_through_two_writers_on_one_path(tmp_path):
+    path = str(tmp_path / "games.ifx")
+    games = randomGames(6)
+    ids = []
+    with GameWriter(path) as first, GameWriter(path) as second:
+        for i, (moves, result) in enumerate(games):
+            ids.append((first if i % 2 else second).write(moves, result))
+    assert ids == list(range(len(games)))
+
+    streamed = [(game_id, result, list(moves)) for game_id, result, moves in readGames(path)]
+    assert streamed == [(game_id, result, moves) for game_id, (moves, result) in zip(ids, games)]
+    with GameIndex(path) as index:
+        assert len(index) == len(games)
+        for game_id, (moves, result) in reversed(list(zip(ids, games))):
+            stored_result, stored_moves = index.read(game_id)
+            assert (stored_result, list(stored_moves)) == (result, moves)
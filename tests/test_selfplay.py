@@ -0,0 +1,47 @@
+import pytest
+
+from agent.engine import Engine, Node, expand
+from agent.evalcache import EvalCache
+from agent.selfplay import SelfPlay, SelfPlayGame
+from agent.state import State
+
+
+@pytest.mark.parametrize("evaluator", ["utility", "greedy"])
+def test_leaf_values_match_an_engine_sharing_the_cache(evaluator):
+    eval_cache = EvalCache(1 << 20)
+    selfplay = SelfPlay(evaluator, depth=2, eval_cache=eval_cache)
+    node = Node(State())
+    node.push(24)
+    node.push(0)
+    leaves = []
+    expand(selfplay.engine, node, 1, leaves)
+    values = selfplay.evaluateLeaves(leaves)
+
+    engine = Engine("alphabeta", evaluator, eval_cache=EvalCache(1 << 20))
+    for (cells, turn, key), value in zip(leaves, values):
+        assert engine.leafKey(Node(State(cells, turn)).zhash) == key
+        assert eval_cache.get(key) == pytest.approx(value)
+        assert engine.evaluate(Node(State(cells, turn, 3))) == pytest.approx(value, abs=1e-4)
+
+
+def test_evaluators_do_not_share_keys():
+    node = Node(State())
+    assert SelfPlay("utility").engine.leafKey(node.zhash) != SelfPlay("greedy").engine.leafKey(node.zhash)
+
+
+def test_kept_trees_choose_the_moves_of_fresh_searches():
+    kept = SelfPlay("greedy", depth=2, seed=1)
+    fresh = SelfPlay("greedy", depth=2, seed=1)
+    kept_games = [SelfPlayGame(kept.rng, 4) for _ in range(3)]
+    fresh_games = [SelfPlayGame(fresh.rng, 4) for _ in range(3)]
+    for _ in range(4):
+        for game in fresh_games:
+            game.tree = None
+        kept.step([game for game in kept_games if not game.finished])
+        fresh.step([game for game in fresh_games if not game.finished])
+        assert [game.moves for game in kept_games] == [game.moves for game in fresh_games]
+
+
+def test_depth_must_be_positive():
+    with pytest.raises(ValueError):
+        SelfPlay("greedy", depth=0)
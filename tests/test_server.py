@@ -0,0 +1,44 @@
+from agent.server import SessionPool, respond
+from agent.state import spawnMove
+
+CENTRE = spawnMove(3 * 7 + 3)
+
+
+def new(game, color="RED", **request):
+    return {"game": game, "op": "new", "color": color, "options": {"depth": 1}, **request}
+
+
+def test_a_game_runs_through_the_protocol():
+    pool = SessionPool()
+    assert respond(pool, new(1)) == {"ok": True}
+    assert respond(pool, {"game": 1, "op": "action", "referee": {}}) == {"move": CENTRE}
+    assert respond(pool, {"game": 1, "op": "turn", "color": "RED", "move": CENTRE}) == {"ok": True}
+    assert respond(pool, {"game": 1, "op": "turn", "color": "BLUE", "move": spawnMove(0)}) == {"ok": True}
+    move = respond(pool, {"game": 1, "op": "action", "referee": {"time_remaining": 100.0}})["move"]
+    assert respond(pool, {"game": 1, "op": "turn", "color": "RED", "move": move}) == {"ok": True}
+    assert pool.get(1).game.turn_count == 3
+    assert respond(pool, {"game": 1, "op": "close"}) == {"ok": True}
+    assert not pool.sessions
+
+
+def test_games_share_engines_by_search_evaluator_and_options():
+    pool = SessionPool()
+    respond(pool, new(1))
+    respond(pool, new(2, "BLUE"))
+    respond(pool, new(3, evaluator="greedy"))
+    respond(pool, new(4, options={"depth": 2}))
+    engines = [pool.get(game).engine for game in (1, 2, 3, 4)]
+    assert engines[0] is engines[1]
+    assert len({id(engine) for engine in engines}) == 3
+    assert len(pool.engines) == 3
+
+
+def test_errors_are_replied():
+    pool = SessionPool(max_sessions=1)
+    respond(pool, new(1))
+    assert respond(pool, new(1))["error"].startswith("ValueError: Game 1 already open")
+    assert respond(pool, new(2))["error"].startswith("RuntimeError: Server is full")
+    assert respond(pool, {"game": 2, "op": "action"})["error"] == "ValueError: No open game 2"
+    assert respond(pool, {"game": 1, "op": "resign"})["error"] == "ValueError: Unknown op resign"
+    assert respond(pool, {"game": 1, "op": "new", "color": "GREEN"})["error"].startswith("KeyError")
+    assert respond(pool, {"op": "close"})["error"].startswith("KeyError")
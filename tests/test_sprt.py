@@ -0,0 +1,46 @@
+import math
+
+from agent.sprt import OPENING_PLIES, llr, randomOpenings
+from agent.state import State
+
+UPPER = math.log(0.95 / 0.05)
+LOWER = math.log(0.05 / 0.95)
+
+
+def test_all_wins_accepts_h1():
+    assert llr([2.0] * 500, 0, 5) > UPPER
+
+
+def test_all_losses_accepts_h0():
+    assert llr([0.0] * 500, 0, 5) < LOWER
+
+
+def test_all_draws_accepts_h0():
+    # A score of exactly 50% is evidence for elo0 = 0 over elo1 = 5
+    assert llr([1.0] * 5000, 0, 5) < LOWER
+
+
+def test_few_wins_are_not_decisive():
+    assert LOWER < llr([2.0] * 3, 0, 5) < UPPER
+
+
+def test_matches_unregularised_ratio_on_long_runs():
+    scores = [0.0, 0.5, 1.0, 1.5, 2.0, 1.5, 1.0, 1.5] * 500
+    n = len(scores)
+    mean = sum(score / 2 for score in scores) / n
+    variance = sum((score / 2 - mean) ** 2 for score in scores) / n
+    s0, s1 = 0.5, 1 / (1 + 10 ** (-5 / 400))
+    expected = n * (s1 - s0) * (2 * mean - s0 - s1) / (2 * variance)
+    assert math.isclose(llr(scores, 0, 5), expected, rel_tol=0.01)
+
+
+def test_openings_leave_the_game_running():
+    openings = randomOpenings(5000)
+    assert len(openings) == 5000
+    for moves in openings:
+        assert len(moves) == OPENING_PLIES
+        state = State()
+        for move in moves:
+            assert not state.game_over
+            state.apply(move)
+        assert not state.game_over
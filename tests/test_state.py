@@ -0,0 +1,36 @@
+import random
+
+from referee.game import Board
+
+from agent.position import fromBoard, legalActions
+from agent.records import encodeAction
+from agent.state import POWER_MASK, State, isSpawn, moveCell, moveDirection, randomWalk
+
+
+def test_spreads_match_the_referee_board():
+    rng = random.Random(0)
+    for _ in range(3):
+        board = Board()
+        state = State()
+        while not board.game_over:
+            actions = legalActions(board)
+            assert sorted(state.legalMoves()) == sorted(encodeAction(action) for action in actions)
+            action = rng.choice(actions)
+            move = encodeAction(action)
+            if not isSpawn(move):
+                captured = sum(1 for change in board.apply_action(action).cell_mutations
+                               if change.prev.player not in (None, board.turn_color.opponent)
+                               and change.cell != action.cell)
+                board.undo_action()
+                assert captured == state.captureCount(moveCell(move), moveDirection(move))
+            board.apply_action(action)
+            state.apply(move)
+            assert state.cells == fromBoard(board).cells
+            assert state.masks == State(state.cells).masks
+
+
+def test_total_power_and_masks_match_a_rebuild_across_apply_and_undo():
+    for state, _ in randomWalk(3):
+        rebuilt = State(state.cells)
+        assert state.masks == rebuilt.masks
+        assert state.total_power == sum(value & POWER_MASK for value in state.cells)
@@ -0,0 +1,21 @@
+import random
+
+from agent.state import State, randomWalk
+from agent.symmetry import PERMUTATIONS, canonicalKey, stateHash
+
+
+def transformed(state, perm):
+    cells = bytearray(len(state.cells))
+    for cell, value in enumerate(state.cells):
+        cells[perm[cell]] = value
+    return State(cells, state.turn, state.turn_count)
+
+
+def test_symmetric_positions_share_a_canonical_key():
+    rng = random.Random(0)
+    for step, (state, _) in enumerate(randomWalk(2)):
+        if step % 25:
+            continue
+        key = canonicalKey(stateHash(state))
+        for perm in rng.sample(PERMUTATIONS, 12):
+            assert canonicalKey(stateHash(transformed(state, perm))) == key